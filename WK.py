@@ -1,11 +1,24 @@
+from io import BytesIO
+
 import streamlit as st
 import pandas as pd
-from io import BytesIO
-from datetime import datetime
-import re
+
+from timesheet import perf
+from timesheet.cleaning import (
+    clean_timesheet, index_designation, read_timesheet, read_timesheet_chunks, trim_text_columns, unmatched_names,
+)
+from timesheet.cache import clean_uploads
+from timesheet.config import BASE_DATE
+from timesheet.dates import CALENDAR_COLUMNS
+from timesheet.export import download_section, frame_digest
+from timesheet.incremental import ingest_incremental
+from timesheet.jobs import current_job, session_job, wait_for
+from timesheet.schema import memory_report
+from timesheet.store import data_version, save_cleaned, save_cleaned_chunks
 
 # --- CONFIG ---
 st.set_page_config(page_title="QuickBooks Timesheet Cleaner", layout="centered")
+perf.begin("Upload")
 
 from PIL import Image
 
@@ -25,106 +38,143 @@ st.markdown(
 )
 st.markdown("---")
 
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def load_designation(data):
+    """Parse a designation upload once per distinct file into ``index_designation``'s (table, duplicates).
+
+    Returns None when the file has no Employee Name column.
+    """
+    designation_raw = pd.read_excel(BytesIO(data))
+    if "Employee Name" not in designation_raw.columns:
+        return None
+    return index_designation(designation_raw)
+
+
+def ingest_week_changes(data, name, designation_df, base_date, progress):
+    """Incremental mode job: store only the new or changed weeks of one export."""
+    progress(0.1, "Reading the export")
+    raw = read_timesheet(BytesIO(data), name)
+    progress(0.3, "Comparing weeks with the stored data")
+    return ingest_incremental(raw, designation_df, base_date)
+
+
+def ingest_in_chunks(data, designation_df, base_date, progress):
+    """Streaming mode job: clean and store one csv export chunk by chunk; returns the rows stored."""
+    source = BytesIO(data)
+
+    def cleaned_chunks():
+        for number, chunk in enumerate(read_timesheet_chunks(source), start=1):
+            yield clean_timesheet(chunk, designation_df, base_date)
+            progress(source.tell() / max(len(data), 1), f"Stored chunk {number}")
+
+    return save_cleaned_chunks(cleaned_chunks())
+
+
 # --- FILE UPLOADS ---
-st.subheader("📤 Upload Your QuickBooks Timesheet File")
-uploaded_file = st.file_uploader("Choose Excel or CSV file", type=["xlsx", "xls", "csv"], key="timesheet")
+st.subheader("📤 Upload Your QuickBooks Timesheet Files")
+uploaded_files = st.file_uploader(
+    "Choose one or more Excel or CSV files (e.g. monthly exports; where they overlap, later files win)",
+    type=["xlsx", "xls", "csv"], key="timesheet", accept_multiple_files=True,
+)
 
 st.subheader("📤 Upload Designation Mapping File")
 designation_file = st.file_uploader("Upload Designation Excel (Employee Name, Team Name, Position, USD/Hr)", type=["xlsx", "xls"], key="designation")
 
-if uploaded_file:
-    if uploaded_file.name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file, skiprows=4)
-    else:
-        df = pd.read_excel(uploaded_file, skiprows=4)
-
-    original_columns = df.columns.tolist()
-    if original_columns:
-        df.rename(columns={original_columns[0]: "Employee Name"}, inplace=True)
-
-    if "Employee Name" in df.columns:
-        df["Employee Name"] = df["Employee Name"].fillna(method="ffill")
-        df["Employee Name"] = df["Employee Name"].str.replace(r"^\*", "", regex=True).str.strip()
-
-    if "Product/Service full name" in df.columns:
-        df["Product/Service full name"] = df["Product/Service full name"].str.replace(r"^Internal:", "", regex=True).str.strip()
-        df["Product/Service full name"] = df["Product/Service full name"].apply(
-            lambda x: "Time off" if str(x).strip().startswith("Time off:") else x
-        )
-        roles_to_convert = [
-            "Rates:Application Engineer I", "Rates:Senior Engineer I", "Rates:Application Engineer II",
-            "Rates:Principal Engineer I", "Rates:Senior Director", "Rates:Intern",
-            "Rates:Director/Principal Engineer- II", "Rates:Admin Assistant", "Rates:Senior Engineer II",
-            "Rates:Assistant Application Engineer", "Rates:CAD Designer"
-        ]
-        df["Product/Service full name"] = df["Product/Service full name"].apply(
-            lambda x: "Projects" if str(x).strip() in roles_to_convert else x
-        )
-
-    if "Client full name" in df.columns and "Product/Service full name" in df.columns:
-        df["Product/Service full name"] = df.apply(
-            lambda row: "Internal Billable"
-            if str(row["Client full name"]).startswith("Enerzinx LLC:") else row["Product/Service full name"],
-            axis=1
-        )
-
-    if "Activity date" in df.columns:
-        df["Activity date"] = pd.to_datetime(df["Activity date"], format="%m/%d/%Y", errors="coerce")
-        df["Activity date"] = df["Activity date"].dt.strftime("%d/%m/%Y")
-        base_date = datetime.strptime("30/12/2024", "%d/%m/%Y")
-        activity_dates = pd.to_datetime(df["Activity date"], format="%d/%m/%Y", errors="coerce")
-        df["Week Number"] = activity_dates.apply(lambda d: f"Week {(d - base_date).days // 7 + 1}" if pd.notnull(d) and (d - base_date).days >= 0 else "Before Week 1")
+base_date = st.date_input("Week 1 starts on", value=BASE_DATE.date(), format="DD/MM/YYYY")
 
+if uploaded_files:
     # --- Merge Designation File ---
+    designation_df = None
     if designation_file:
         try:
-            designation_df = pd.read_excel(designation_file)
-            if "Employee Name" in designation_df.columns:
-                designation_df["Employee Name"] = designation_df["Employee Name"].str.strip()
-                designation_df = designation_df[["Employee Name", "Team Name", "Position", "USD/Hr"]]
-                df = pd.merge(df, designation_df, how="left", on="Employee Name")
+            with perf.stage("read designation"):
+                designation = load_designation(designation_file.getvalue())
+            if designation is not None:
+                designation_df, duplicates = designation
                 st.success("✅ Designation data merged successfully.")
+                if duplicates:
+                    st.warning(f"⚠️ Listed more than once in the designation file (first row used): {', '.join(map(str, duplicates))}")
             else:
                 st.error("❌ 'Employee Name' not found in designation file.")
         except Exception as e:
             st.error(f"❌ Error reading designation file: {e}")
 
-    def parse_duration_to_hours(duration_str):
-        try:
-            if pd.isnull(duration_str):
-                return 0
-            if isinstance(duration_str, (float, int)):
-                return float(duration_str)
-            match = re.match(r'^\s*(\d{1,2}):(\d{2})\s*$', str(duration_str).strip())
-            if match:
-                return int(match.group(1)) + int(match.group(2)) / 60
-            return 0
-        except:
-            return 0
-
-    if "Duration" in df.columns:
-        df["Hours"] = df["Duration"].apply(parse_duration_to_hours)
-        if "USD/Hr" in df.columns and "Product/Service full name" in df.columns:
-            df["Projects USD"] = df.apply(
-                lambda row: row["USD/Hr"] * row["Hours"] if row["Product/Service full name"] == "Projects" else 0,
-                axis=1
-            )
-            df["Projects USD"] = df["Projects USD"].round(2)
+    # --- Processing Mode (incremental and streaming work on a single export) ---
+    modes = ["Full (preview, optional tools and download)"]
+    if len(uploaded_files) == 1:
+        uploaded_file = uploaded_files[0]
+        modes.append("Incremental (only new or changed weeks)")
+        if uploaded_file.name.endswith(".csv"):
+            modes.append("Streaming (large CSV exports, cleaned and stored in chunks)")
+    mode = st.radio("Processing mode", modes)
+
+    if mode != modes[0]:
+        if designation_df is None:
+            st.warning("⚠️ This mode stores the data for the dashboards directly, so it needs the designation file.")
+            st.stop()
+        # Cleaning runs as a background job, so widget reruns show its progress instead of restarting it
+        job_key = (mode, uploaded_file.file_id, designation_file.file_id, base_date)
+        if st.button("🚀 Clean and store"):
+            if mode == modes[1]:
+                job_args = (ingest_week_changes, uploaded_file.getvalue(), uploaded_file.name, designation_df, base_date)
+            else:
+                job_args = (ingest_in_chunks, uploaded_file.getvalue(), designation_df, base_date)
+            session_job("store_job", job_key, *job_args, restart=True)
+        job = current_job("store_job", job_key)
+        if job is not None:
+            wait_for(job, "Cleaning and storing")
+            if job.error is not None:
+                st.error(f"❌ Could not clean and store the export: {job.error}")
+            elif mode == modes[1]:
+                summary = job.result()
+                if summary["full"]:
+                    st.success(f"✅ Stored data rebuilt: {summary['rows']:,} rows in {len(summary['new'])} weeks.")
+                elif summary["new"] or summary["changed"]:
+                    st.success(
+                        f"✅ {summary['rows']:,} rows cleaned: new weeks {summary['new']}, changed weeks "
+                        f"{summary['changed']}; {summary['unchanged']} weeks unchanged."
+                    )
+                else:
+                    st.info(f"No new or changed weeks; all {summary['unchanged']} weeks are up to date.")
+            else:
+                st.success(f"✅ {job.result():,} rows cleaned and stored for dashboard access.")
+            st.page_link("pages/1_dashboard.py", label="📊 Go to Team Dashboard", icon="📈")
+        perf.panel()
+        st.stop()
+
+    # Cleaned in a background job kept across reruns; a new upload, designation file or base date starts another
+    job_key = (
+        tuple(file.file_id for file in uploaded_files),
+        designation_file.file_id if designation_file else None, designation_df is not None, base_date,
+    )
+    job = session_job("clean_job", job_key, clean_uploads, uploaded_files, designation_file, designation_df, base_date)
+    wait_for(job, "Cleaning uploads")
+    if job.error is not None:
+        st.error(f"❌ Could not clean the uploads: {job.error}")
+        st.stop()
+    df = job.result()
 
     st.success("✅ Data cleaned successfully.")
+    if designation_df is not None and "Activity date" in df.columns:
+        unmatched = unmatched_names(df.loc[df["Activity date"].notna(), "Employee Name"], designation_df)
+        if unmatched:
+            st.warning(f"⚠️ No designation row for: {', '.join(map(str, unmatched))}")
     st.write("### 🔍 Preview of Cleaned Data", df.head())
 
     # Optional tools
     st.markdown("### ✨ Optional Cleaning Tools")
     if st.checkbox("Trim Whitespace from All Text Columns"):
-        df = df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+        df = trim_text_columns(df)
         st.success("Whitespace trimmed.")
 
     missing_action = st.selectbox("Handle Missing Values", ["Do Nothing", "Fill with 'Unknown'", "Fill with 0", "Drop Rows"])
+    # Dates and the calendar keys derived from them keep their types
+    fillable = [c for c in df.columns if c not in ("Activity date", *CALENDAR_COLUMNS)]
     if missing_action == "Fill with 'Unknown'":
-        df = df.fillna("Unknown")
+        df = df.fillna({c: "Unknown" for c in fillable})
     elif missing_action == "Fill with 0":
-        df = df.fillna(0)
+        df = df.fillna({c: 0 for c in fillable})
     elif missing_action == "Drop Rows":
         df = df.dropna()
 
@@ -134,38 +184,36 @@ if uploaded_file:
 
     st.write("### 🧾 Final Cleaned Data Preview", df.head())
 
-    # Download Cleaned File
-    def convert_df_to_excel(dataframe):
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            dataframe.to_excel(writer, index=False)
-        return output.getvalue()
-
-    st.download_button(
-        label="📥 Download Cleaned File",
-        data=convert_df_to_excel(df),
-        file_name="cleaned_timesheet.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    # Download Cleaned File (built only when requested)
+    download_section(df, "📥 Download Cleaned File", "cleaned_timesheet", key="cleaned")
 
-    # Save to session state and file
+    # Save to the shared store
     try:
         if (
             "Projects USD" in df.columns and
             designation_file is not None and
-            'designation_df' in locals() and
+            designation_df is not None and
             "Employee Name" in designation_df.columns
         ):
-            st.session_state["cleaned_df"] = df.copy()
-            st.session_state["designation_df"] = designation_df.copy()
-
-            # ✅ Save cleaned file to disk for dashboard fallback
-            df.to_excel("cleaned_data.xlsx", index=False)
+            # ✅ Save cleaned data to disk for the dashboards, unless this session already saved the same
+            # frame and nothing replaced it since: every save invalidates the shared caches of all sessions,
+            # and reruns from the widgets above mostly keep the same data
+            digest = frame_digest(df)
+            saved = st.session_state.get("saved_store")
+            if saved is None or saved[0] != digest or saved[1] != data_version():
+                stored_df = save_cleaned(df)
+                st.session_state["saved_store"] = (digest, data_version(), stored_df)
+            else:
+                stored_df = saved[2]
 
             st.markdown("---")
             st.success("✅ Data prepared and stored for dashboard access.")
-            st.page_link("1_Dashboard", label="📊 Go to Team Dashboard", icon="📈")
+            with st.expander("Memory footprint of the stored data"):
+                st.dataframe(memory_report(df, stored_df), use_container_width=True)
+            st.page_link("pages/1_dashboard.py", label="📊 Go to Team Dashboard", icon="📈")
     except Exception as e:
         st.warning(f"⚠️ Could not prepare dashboard view: {e}")
 else:
     st.info("Please upload a QuickBooks timesheet to begin.")
+
+perf.panel()
@@ -0,0 +1 @@
+"""Performance benchmarks for the cleaning pipeline and dashboard computations (see ``benchmarks.run``)."""
@@ -0,0 +1,113 @@
+"""Time the cleaning pipeline and the dashboard computations on synthetic exports.
+
+    python -m benchmarks.run                          # 10k, 100k and 1M rows
+    python -m benchmarks.run --sizes 10k 100k --json results.json
+    python -m benchmarks.run --compare results.json   # exit 1 on regressions
+
+Datasets are generated once into ``--data-dir`` and reused. Every benchmark
+reports the best of ``--repeat`` runs; with ``--compare``, a benchmark slower
+than the baseline by more than ``--tolerance`` counts as a regression.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import write_dataset
+from timesheet.cleaning import ENGINES, clean_timesheet, prepare_designation, read_timesheet
+from timesheet.cube import build_cube
+from timesheet.insights import TEAMS, compute_insights
+from timesheet.metrics import (
+    employee_weeks, latest_week_label, service_share, weekly_hours_shortfall, weekly_utilization,
+)
+from timesheet.store import load_cleaned, load_cube, load_partitions, replace_weeks, save_cleaned
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def best_time(func, repeat):
+    """Best wall time of ``repeat`` calls of ``func`` and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def dashboard(cube):
+    teams = list(TEAMS)
+    weekly_utilization(cube, teams)
+    service_share(cube, teams, week=latest_week_label(cube))
+    service_share(cube, teams)
+
+
+def run_size(rows, data_dir, repeat, engine=None):
+    timesheet_path = os.path.join(data_dir, f"timesheet_{rows}.csv")
+    designation_path = os.path.join(data_dir, f"designation_{rows}.xlsx")
+    if not (os.path.exists(timesheet_path) and os.path.exists(designation_path)):
+        write_dataset(rows, data_dir)
+    designation_df = prepare_designation(pd.read_excel(designation_path))
+
+    results = {}
+    results["read export"], raw = best_time(lambda: read_timesheet(timesheet_path), repeat)
+    results["clean timesheet"], cleaned = best_time(lambda: clean_timesheet(raw, designation_df, engine=engine), repeat)
+    with tempfile.TemporaryDirectory() as store_dir:
+        path, cube_path = os.path.join(store_dir, "cleaned"), os.path.join(store_dir, "cube.parquet")
+        results["save store"], stored = best_time(lambda: save_cleaned(cleaned, path, cube_path), repeat)
+        results["load cleaned data"], _ = best_time(lambda: load_cleaned(path), repeat)
+        latest = [stored["Week"].max()]
+        results["load latest week"], _ = best_time(lambda: load_partitions(latest, path=path), repeat)
+        latest_rows = stored[stored["Week"].isin(latest)]
+        results["replace latest week"], _ = best_time(lambda: replace_weeks(latest_rows, latest, path, cube_path), repeat)
+        results["load cube"], cube = best_time(lambda: load_cube(cube_path, path), repeat)
+    results["build cube"], _ = best_time(lambda: build_cube(stored), repeat)
+    results["dashboard aggregations"], _ = best_time(lambda: dashboard(cube), repeat)
+    results["employee weeks"], facts = best_time(lambda: employee_weeks(cube), repeat)
+    results["data check"], _ = best_time(lambda: weekly_hours_shortfall(facts), repeat)
+    results["team insights"], _ = best_time(lambda: compute_insights(cube, facts), repeat)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    parser.add_argument("--data-dir", default="bench_data", help="where generated datasets are kept (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark, best is reported (default: %(default)s)")
+    parser.add_argument("--engine", choices=ENGINES, help="cleaning engine (default: the TIMESHEET_ENGINE setting)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="baseline results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="slowdown factor counted as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in args.sizes:
+        results[size] = run_size(SIZES[size], args.data_dir, args.repeat, args.engine)
+        for name, seconds in results[size].items():
+            print(f"{size:>5}  {name:<24} {seconds:9.4f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = [
+            f"{size} {name}: {seconds:.4f}s vs {baseline[size][name]:.4f}s"
+            for size, timings in results.items() for name, seconds in timings.items()
+            if name in baseline.get(size, {}) and seconds > baseline[size][name] * args.tolerance
+        ]
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
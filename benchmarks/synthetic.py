@@ -0,0 +1,130 @@
+"""Synthetic QuickBooks "Time Activities by Employee Detail" exports and designation workbooks.
+
+The exports follow the real layout: a 4-line report header, each employee's
+name on its own row (some starred) followed by activity rows with a blank
+name column, a "Total for" row per employee and a trailing accrual-basis
+line. Activities use "Internal:", "Time off:" and "Rates:" services, client
+names including "Enerzinx LLC:" ones, and HH:MM durations.
+
+    python -m benchmarks.synthetic --rows 100000 --out bench_data
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from timesheet.config import BASE_DATE
+from timesheet.insights import TEAMS
+from timesheet.rules import load_rules
+
+COLUMNS = [
+    "", "Activity date", "Client full name", "Product/Service full name", "Description", "Rates",
+    "Duration", "Billable (Y/N)", "Amount",
+]
+REPORT_HEADER = "Time Activities by Employee Detail\nEnerzinx\n{start} - {end}\n\n"
+POSITIONS = ["TM", "TL", "ATL", "Intern"]
+INTERNAL_SERVICES = [
+    "Internal:Administrative", "Internal:Admin - Meetings", "Internal:Proposals", "Internal:Training",
+    "Internal:Business Development",
+]
+TIME_OFF_SERVICES = ["Time off:Vacation", "Time off:Sick", "Time off:Holiday", "Time off:Compensatory leave"]
+CLIENTS = ["Acme Solar", "Northwind Energy", "Contoso Grid", "Fabrikam Power", "Enerzinx LLC:Internal"]
+PROJECT_ROLES = next(rule["value"] for rule in load_rules() if rule.get("to") == "Projects")
+ROWS_PER_EMPLOYEE_WEEK = 5
+WEEKS = 26
+
+
+def employee_count(rows, weeks=WEEKS):
+    """Headcount giving about one working week of activity rows per employee and week."""
+    return max(1, rows // (weeks * ROWS_PER_EMPLOYEE_WEEK))
+
+
+def employee_names(count):
+    return [f"Employee {i:04d}" for i in range(count)]
+
+
+def designation(count, seed=0):
+    """Designation table for ``count`` employees, spread over the dashboard teams."""
+    rng = np.random.default_rng(seed)
+    teams = list(TEAMS)
+    return pd.DataFrame({
+        "Employee Name": employee_names(count),
+        "Team Name": [teams[i % len(teams)] for i in range(count)],
+        "Position": rng.choice(POSITIONS, count, p=[0.6, 0.2, 0.15, 0.05]),
+        "USD/Hr": rng.choice([25, 30, 35, 40, 45, 50, 60], count),
+    })
+
+
+def export(rows, seed=0, weeks=WEEKS):
+    """Raw export of about ``rows`` activity rows, as the text of a QuickBooks csv."""
+    rng = np.random.default_rng(seed)
+    employees = employee_count(rows, weeks)
+    names = np.array(employee_names(employees), dtype=object)
+
+    employee = np.sort(rng.integers(0, employees, rows))
+    day = rng.integers(0, weeks * 7, rows)
+    dates = pd.Timestamp(BASE_DATE) + pd.to_timedelta(day, unit="D")
+    kind = rng.choice(3, rows, p=[0.55, 0.3, 0.15])
+    services = np.select(
+        [kind == 0, kind == 1],
+        [rng.choice(PROJECT_ROLES, rows), rng.choice(INTERNAL_SERVICES, rows)],
+        rng.choice(TIME_OFF_SERVICES, rows),
+    )
+    minutes = rng.choice([60, 120, 240, 360, 420, 480, 480, 480, 540], rows)
+    activities = pd.DataFrame({
+        "employee": employee,
+        "order": 1,
+        "day": day,
+        "minutes": minutes,
+        "": None,
+        "Activity date": dates.strftime("%m/%d/%Y"),
+        "Client full name": np.where(kind == 0, rng.choice(CLIENTS, rows), None),
+        "Product/Service full name": services,
+        "Description": np.where(kind == 2, "Leave", "Work on deliverables"),
+        "Rates": 0.0,
+        "Duration": [f"{m // 60:02d}:{m % 60:02d}" for m in minutes],
+        "Billable (Y/N)": np.where(kind == 0, "Yes", "No"),
+        "Amount": None,
+    }).sort_values(["employee", "day"], kind="stable")
+
+    starred = np.where(rng.random(employees) < 0.2, "*", "") + names
+    totals = activities.groupby("employee")["minutes"].sum().reindex(np.arange(employees), fill_value=0)
+    headers = pd.DataFrame({"employee": np.arange(employees), "order": 0, "": starred})
+    footers = pd.DataFrame({
+        "employee": np.arange(employees), "order": 2, "": "Total for " + starred,
+        "Duration": [f"{m // 60}:{m % 60:02d}" for m in totals],
+    })
+    report = pd.concat([headers, activities, footers], ignore_index=True)
+    report = report.sort_values(["employee", "order"], kind="stable")[COLUMNS]
+
+    start, end = dates.min(), dates.max()
+    text = REPORT_HEADER.format(start=f"{start:%B} {start.day}, {start.year}", end=f"{end:%B} {end.day}, {end.year}")
+    text += report.to_csv(index=False)
+    return text + '"Accrual Basis Monday, January 5, 2026 09:00 AM GMTZ"\n'
+
+
+def write_dataset(rows, directory, seed=0):
+    """Write ``timesheet_<rows>.csv`` and its ``designation_<rows>.xlsx`` into ``directory``; returns both paths."""
+    os.makedirs(directory, exist_ok=True)
+    timesheet_path = os.path.join(directory, f"timesheet_{rows}.csv")
+    designation_path = os.path.join(directory, f"designation_{rows}.xlsx")
+    with open(timesheet_path, "w", newline="") as f:
+        f.write(export(rows, seed))
+    designation(employee_count(rows), seed).to_excel(designation_path, index=False)
+    return timesheet_path, designation_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic", description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000], help="activity rows per export")
+    parser.add_argument("--out", default="bench_data", help="output directory (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    for rows in args.rows:
+        for path in write_dataset(rows, args.out, args.seed):
+            print(path)
+
+
+if __name__ == "__main__":
+    main()
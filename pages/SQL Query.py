@@ -0,0 +1,52 @@
+import duckdb
+import streamlit as st
+
+from timesheet import perf
+from timesheet.export import download_section
+from timesheet.sql import VIEWS, query
+from timesheet.store import CLEANED_STORE, cleaned_data_exists, load_cleaned, load_shared_cube, store_version
+
+st.set_page_config(page_title="SQL Query", layout="wide")
+perf.begin("SQL Query")
+
+st.title("🧮 Ad-hoc SQL Query")
+
+EXAMPLE_QUERY = """SELECT "Team Name", "Week Number", round(sum("Hours"), 2) AS "Hours"
+FROM cube
+WHERE "Week" > 0
+GROUP BY ALL
+ORDER BY min("Week"), "Team Name"
+"""
+
+# Step 1: Check for cleaned data (a legacy workbook or single-file store is converted to week files first)
+if not cleaned_data_exists():
+    st.error(f"❌ '{CLEANED_STORE}' not found. Please run the data cleaning tool first.")
+    st.stop()
+if store_version() is None:
+    load_cleaned()
+load_shared_cube()
+
+# Step 2: Available tables
+with st.expander("Tables: " + ", ".join(VIEWS)):
+    st.markdown("`timesheet` holds the cleaned rows, `cube` the hours and Projects USD per team, employee, position, week, month and service.")
+    for name in VIEWS:
+        st.markdown(f"**{name}**")
+        st.dataframe(query(f"SELECT column_name, column_type FROM (DESCRIBE {name})"), hide_index=True)
+
+# Step 3: Query box (read-only; the last query run is kept across reruns)
+sql = st.text_area("SQL (one SELECT statement)", value=EXAMPLE_QUERY, height=180)
+if st.button("▶️ Run query"):
+    st.session_state["sql_query"] = sql
+
+submitted = st.session_state.get("sql_query")
+if submitted:
+    try:
+        result = query(submitted)
+    except (duckdb.Error, ValueError) as e:
+        st.error(f"❌ {e}")
+    else:
+        st.caption(f"{len(result):,} rows")
+        st.dataframe(result, use_container_width=True)
+        download_section(result, "📥 Download Query Result", "query_result", key="sql_result")
+
+perf.panel()
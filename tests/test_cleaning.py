@@ -0,0 +1,25 @@
+import pandas as pd
+
+from timesheet.cleaning import index_designation, join_designation, unmatched_names
+
+
+def test_designation_join_keeps_rows_and_reports_repeated_and_unmatched_names():
+    designation, duplicates = index_designation(pd.DataFrame({
+        "Employee Name": ["Emp A", "emp  a", "Emp B ", "Emp C"],
+        "Team Name": ["Team 1", "Team 2", "Team 1", "Team 3"],
+        "Position": ["Engineer", "Lead", "Designer", "Engineer"],
+        "USD/Hr": [50.0, 60.0, 40.0, 45.0],
+    }))
+    raw = pd.DataFrame({
+        "Employee Name": ["Emp A", "EMP A", "Emp  B", "Emp D", "Emp A"],
+        "Hours": [8.0, 7.5, 8.0, 4.0, 1.0],
+    })
+
+    out = join_designation(raw, designation)
+
+    assert len(out) == len(raw)
+    assert out["Employee Name"].tolist() == raw["Employee Name"].tolist()
+    assert out["Team Name"].fillna("").tolist() == ["Team 1", "Team 1", "Team 1", "", "Team 1"]
+    assert out["USD/Hr"].tolist()[:3] == [50.0, 50.0, 40.0]
+    assert sorted(duplicates) == ["Emp A", "emp  a"]
+    assert unmatched_names(raw["Employee Name"], designation) == ["Emp D"]
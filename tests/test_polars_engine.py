@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from timesheet.cleaning import clean_timesheet
+
+pytest.importorskip("polars")
+
+
+def test_polars_engine_matches_pandas_on_mixed_object_columns():
+    raw = pd.DataFrame({
+        "Unnamed: 0": ["*Emp A ", np.nan, 7, np.nan, "Emp B", np.nan, np.nan],
+        "Activity date": ["01/02/2025"] * 7,
+        "Client full name": ["Foo:Bar", 5, np.nan, "Enerzinx LLC:Internal", 5.5, "Client", np.nan],
+        "Product/Service full name": ["Rates:CAD Designer", 3.0, "Hiring", np.nan, "Projects", 4, " Projects "],
+        "Duration": ["08:30", 7.5, 2, np.nan, "text", "1084:15", " 1:15 "],
+    }, dtype=object)
+
+    expected = clean_timesheet(raw, engine="pandas")
+    result = clean_timesheet(raw, engine="polars")
+
+    assert result["Hours"].tolist() == [8.5, 7.5, 2.0, 0.0, 0.0, 0.0, 1.25]
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
@@ -0,0 +1,38 @@
+import io
+
+import pandas as pd
+
+from timesheet.cleaning import clean_timesheet, read_timesheet, read_timesheet_chunks
+from timesheet.store import load_cleaned, save_cleaned, save_cleaned_chunks
+
+HEADER = "Time Activities by Employee Detail\nCompany\nJanuary 1 - July 2, 2025\n\n"
+COLUMNS = ",Activity date,Client full name,Product/Service full name,Description,Rates,Duration,Billable (Y/N),Amount\n"
+
+
+def export(rows):
+    return HEADER + COLUMNS + "".join(rows)
+
+
+def sorted_rows(df):
+    return df.astype(object).astype(str).sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def test_streamed_store_matches_whole_file_when_first_chunk_has_empty_columns(tmp_path):
+    rows = ["Emp A,,,,,,,,\n"]
+    rows += [f",01/0{day}/2025,,Projects,,0.0,,No,\n" for day in range(2, 6)]
+    rows += ["Emp B,,,,,,,,\n"]
+    rows += [f",01/1{day}/2025,Client {day}:Internal,Hiring,memo {day},0.0,08:30,Yes,\n" for day in range(2, 6)]
+    text = export(rows)
+
+    whole = save_cleaned(clean_timesheet(read_timesheet(io.StringIO(text), "export.csv")), tmp_path / "whole.parquet",
+                         tmp_path / "whole_cube.parquet")
+    stored_rows = save_cleaned_chunks(
+        (clean_timesheet(chunk) for chunk in read_timesheet_chunks(io.StringIO(text), chunksize=3)),
+        tmp_path / "chunks.parquet", tmp_path / "chunks_cube.parquet",
+    )
+    streamed = load_cleaned(tmp_path / "chunks.parquet")
+
+    assert stored_rows == len(whole)
+    assert streamed["Client full name"].notna().sum() == 4
+    assert set(streamed["Description"].dropna()) == {f"memo {day}" for day in range(2, 6)}
+    pd.testing.assert_frame_equal(sorted_rows(streamed), sorted_rows(load_cleaned(tmp_path / "whole.parquet")))
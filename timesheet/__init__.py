@@ -0,0 +1 @@
+"""Shared data helpers for the QuickBooks timesheet cleaner and dashboards."""
@@ -0,0 +1,5 @@
+import sys
+
+from timesheet.batch import main
+
+sys.exit(main())
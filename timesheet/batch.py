@@ -0,0 +1,124 @@
+"""Headless cleaning of a directory of QuickBooks exports into the dashboard store.
+
+Run ``python -m timesheet EXPORTS_DIR --designation designation.xlsx`` (for
+example from a nightly cron job): every export is read and cleaned in its
+own worker process, and the combined rows and aggregate cube are written to
+the same files the upload page writes, so the dashboards load the
+precomputed data on their next run. Where exports overlap, the file later in
+name order wins.
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from io import BytesIO
+from itertools import repeat
+
+import pandas as pd
+
+from timesheet.cleaning import clean_timesheet, index_designation, read_timesheet, unmatched_names
+from timesheet.config import BASE_DATE
+from timesheet.store import CLEANED_STORE, CUBE_PARQUET, save_cleaned
+
+EXPORT_PATTERNS = ["*.csv", "*.xlsx", "*.xls"]
+
+# Workers are started from a fresh server process, never forked from the caller: the upload page runs
+# this inside Streamlit's threads, and forking a process whose other threads hold locks can deadlock.
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def find_exports(directory, exclude=()):
+    """Timesheet exports in ``directory`` in name order, skipping ``exclude`` and Office lock files."""
+    exclude = {os.path.abspath(path) for path in exclude}
+    paths = {path for pattern in EXPORT_PATTERNS for path in glob.glob(os.path.join(directory, pattern))}
+    return sorted(
+        path for path in paths
+        if os.path.abspath(path) not in exclude and not os.path.basename(path).startswith("~$")
+    )
+
+
+def clean_file(source, designation_df=None, base_date=BASE_DATE, name=None):
+    """Read and clean one export (a path, or the bytes of a file called ``name``); runs in a worker process."""
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    return clean_timesheet(read_timesheet(source, name), designation_df, base_date)
+
+
+def _collect(frames, progress=None):
+    collected = []
+    for frame in frames:
+        collected.append(frame)
+        if progress is not None:
+            progress(len(collected))
+    return collected
+
+
+def clean_each(sources, designation_df=None, base_date=BASE_DATE, workers=None, names=None, progress=None):
+    """Clean every source with ``clean_file``, one export per worker process, returning the frames in order.
+
+    ``progress``, if given, is called with the number of sources cleaned so far.
+    """
+    names = names or [None] * len(sources)
+    arguments = (sources, repeat(designation_df), repeat(base_date), names)
+    if workers == 1 or len(sources) <= 1:
+        return _collect(map(clean_file, *arguments), progress)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD)) as pool:
+        return _collect(pool.map(clean_file, *arguments), progress)
+
+
+def combine_exports(frames):
+    """Concatenate cleaned exports in order, dropping an employee's day from an export when a later export has it too.
+
+    Exports that overlap (monthly files sharing edge days, or a month exported
+    twice) would otherwise count those days twice, while exports that split the
+    same dates by employee are all kept. Rows without a date are always kept.
+    """
+    keys = ["Employee Name", "Activity date"]
+    if any(not set(keys).issubset(frame.columns) for frame in frames):
+        return pd.concat(frames, ignore_index=True)
+    kept, later = [], []
+    for frame in reversed(frames):
+        if later:
+            days = pd.MultiIndex.from_frame(frame[keys])
+            frame = frame[~(days.isin(pd.MultiIndex.from_frame(pd.concat(later))) & frame["Activity date"].notna())]
+        kept.append(frame)
+        later.append(frame[keys])
+    return pd.concat(kept[::-1], ignore_index=True)
+
+
+def clean_files(paths, designation_df=None, base_date=BASE_DATE, workers=None):
+    """Clean ``paths`` in parallel and combine them in order, later files winning where date ranges overlap."""
+    return combine_exports(clean_each(paths, designation_df, base_date, workers))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m timesheet", description=__doc__.splitlines()[0])
+    parser.add_argument("exports", help="directory of QuickBooks timesheet exports (csv, xlsx, xls)")
+    parser.add_argument("--designation", required=True, help="designation workbook (Employee Name, Team Name, Position, USD/Hr)")
+    parser.add_argument("--base-date", type=lambda value: datetime.strptime(value, "%d/%m/%Y"), default=BASE_DATE,
+                        help=f"first day of Week 1 as dd/mm/yyyy (default: {BASE_DATE:%d/%m/%Y})")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--output", default=CLEANED_STORE, help="cleaned rows directory, one file per week (default: %(default)s)")
+    parser.add_argument("--cube", default=CUBE_PARQUET, help="aggregate cube file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    paths = find_exports(args.exports, exclude=[args.designation])
+    if not paths:
+        parser.error(f"no exports found in {args.exports}")
+    designation_df, duplicates = index_designation(pd.read_excel(args.designation))
+    if duplicates:
+        print(f"Listed more than once in {args.designation} (first row used): {', '.join(map(str, duplicates))}", file=sys.stderr)
+
+    started = time.perf_counter()
+    df = clean_files(paths, designation_df, args.base_date, args.workers)
+    unmatched = unmatched_names(df.loc[df["Activity date"].notna(), "Employee Name"], designation_df)
+    if unmatched:
+        print(f"No designation row for: {', '.join(map(str, unmatched))}", file=sys.stderr)
+    save_cleaned(df, args.output, args.cube)
+    print(f"Cleaned {len(df):,} rows from {len(paths)} files into {args.output} "
+          f"in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
@@ -0,0 +1,113 @@
+"""On-disk cache of cleaned uploads, keyed by a hash of the input files and cleaning options.
+
+Re-uploading the same timesheet and designation files (or any rerun of the
+upload page) loads the cleaned frame from a Parquet file instead of running
+the cleaning again. Entries are evicted least recently used first once the
+cache grows past ``CACHE_MAX_MB``; reading an entry marks it as used.
+"""
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+from timesheet.batch import clean_each, combine_exports
+from timesheet.config import BASE_DATE, CACHE_DIR, CACHE_MAX_MB
+from timesheet.perf import staged
+from timesheet.rules import rules_digest
+from timesheet.store import _arrow_safe, _write_parquet
+
+# Bump when the cleaning output changes, so entries written by older code are not served.
+CACHE_VERSION = "3"
+
+
+def content_key(*parts):
+    """SHA-256 of ``parts`` (bytes or str), each length-prefixed so different splits never collide."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode()
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def _entry_path(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.parquet")
+
+
+def get(key, cache_dir=CACHE_DIR):
+    """Return the cached frame for ``key`` and mark it as recently used, or None."""
+    path = _entry_path(key, cache_dir)
+    try:
+        df = pd.read_parquet(path)
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # A damaged entry is dropped and recomputed
+        os.remove(path)
+        return None
+    return df
+
+
+def put(key, df, cache_dir=CACHE_DIR, max_mb=CACHE_MAX_MB):
+    """Store ``df`` under ``key``, then evict least recently used entries beyond ``max_mb``."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _entry_path(key, cache_dir)
+    _write_parquet(_arrow_safe(df), path)
+    evict(cache_dir, max_mb, keep=path)
+
+
+def evict(cache_dir=CACHE_DIR, max_mb=CACHE_MAX_MB, keep=None):
+    """Delete the least recently used entries until the cache fits in ``max_mb`` (``keep`` is never deleted)."""
+    entries = []
+    for path in glob.glob(os.path.join(cache_dir, "*.parquet")):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_mb * 1e6:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+@staged("clean uploads")
+def clean_uploads(files, designation_file=None, designation_df=None, base_date=BASE_DATE, workers=None, progress=None):
+    """Cleaned, combined frame of several uploaded exports, each served from the cache when possible.
+
+    Files missing from the cache are cleaned in parallel worker processes and
+    cached one by one, then all are combined with ``combine_exports``. Each key
+    covers the bytes of the export and of the designation upload, the base date
+    and the service rules; ``designation_df`` must be the frame prepared from
+    ``designation_file``. ``progress(fraction, message)``, if given, is called
+    as files are cleaned.
+    """
+    designation = designation_file.getvalue() if designation_file is not None else b""
+    data = [file.getvalue() for file in files]
+    keys = [
+        content_key(CACHE_VERSION, file.name, content, designation, designation_df is not None,
+                    pd.Timestamp(base_date).isoformat(), rules_digest())
+        for file, content in zip(files, data)
+    ]
+    frames = [get(key) for key in keys]
+    missing = [i for i, frame in enumerate(frames) if frame is None]
+    progress = progress or (lambda fraction, message: None)
+    progress(0.0, f"Cleaning {len(missing)} of {len(files)} files ({len(files) - len(missing)} cached)")
+    cleaned = clean_each(
+        [data[i] for i in missing], designation_df, base_date, workers, [files[i].name for i in missing],
+        progress=lambda done: progress(0.9 * done / len(missing), f"Cleaned {done} of {len(missing)} files"),
+    )
+    for i, frame in zip(missing, cleaned):
+        frames[i] = _arrow_safe(frame)
+        put(keys[i], frames[i])
+    progress(0.95, "Combining exports")
+    return combine_exports(frames)
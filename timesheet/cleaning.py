@@ -0,0 +1,203 @@
+"""Vectorized cleaning of QuickBooks "Time Activities by Employee Detail" exports.
+
+Every step works column-wise (string accessors, masks and numeric arithmetic)
+so cleaning cost grows with the number of rows, not with Python calls per row.
+"""
+import numpy as np
+import pandas as pd
+
+from timesheet.config import BASE_DATE, ENGINE
+from timesheet.dates import add_calendar_columns
+from timesheet.perf import stage, staged
+from timesheet.rules import compiled_rules
+
+DESIGNATION_COLUMNS = ["Employee Name", "Team Name", "Position", "USD/Hr"]
+
+DURATION_PATTERN = r"^\s*(\d{1,2}):(\d{2})\s*$"
+
+EXPORT_DATE_FORMAT = "%m/%d/%Y"
+
+CSV_CHUNK_ROWS = 50_000
+
+# Free-text columns of the export, read from csv as text so a chunk holding only numbers still parses as text.
+TEXT_COLUMNS = ["Client full name", "Product/Service full name", "Description", "Billable (Y/N)"]
+
+ENGINES = ("pandas", "polars")
+
+
+def map_unique(values, func):
+    """Apply a vectorized ``func`` to the distinct values of ``values`` only and broadcast back.
+
+    Timesheet columns repeat a small set of values (durations, service names)
+    across many rows, so this keeps the expensive string work per value.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = func(pd.Series(uniques, dtype=values.dtype))
+    return pd.Series(mapped.to_numpy()[codes], index=values.index, name=values.name)
+
+
+@staged("read export")
+def read_timesheet(file, name=None):
+    """Read a raw QuickBooks export (csv or Excel), skipping its 4-line report header."""
+    name = name or getattr(file, "name", str(file))
+    if str(name).endswith(".csv"):
+        return pd.read_csv(file, skiprows=4, dtype=dict.fromkeys(TEXT_COLUMNS, str))
+    return pd.read_excel(file, skiprows=4)
+
+
+def read_timesheet_chunks(file, chunksize=CSV_CHUNK_ROWS):
+    """Read a raw csv export in chunks of ``chunksize`` rows.
+
+    QuickBooks only names an employee on the first of their rows, so the
+    employee column is forward-filled here, carrying the last name seen into
+    the next chunk; each chunk can then be cleaned on its own.
+    """
+    carry = None
+    for chunk in pd.read_csv(file, skiprows=4, chunksize=chunksize, dtype=dict.fromkeys(TEXT_COLUMNS, str)):
+        names = chunk.iloc[:, 0].ffill()
+        if carry is not None:
+            names = names.fillna(carry)
+        chunk[chunk.columns[0]] = names
+        if names.notna().any():
+            carry = names.iloc[-1]
+        yield chunk
+
+
+def name_keys(names):
+    """Normalized employee names for matching: single spaces, no surrounding whitespace, case-folded."""
+    return map_unique(names.astype(object), lambda values: values.str.split().str.join(" ").str.casefold())
+
+
+def index_designation(designation_df):
+    """Index a designation table by normalized employee name, one row per name.
+
+    Returns ``(designation, duplicates)``: the table with its name keys as a
+    unique index, keeping the first row of a repeated name, and the sorted
+    names that the file lists more than once.
+    """
+    designation_df = designation_df[DESIGNATION_COLUMNS].copy()
+    designation_df["Employee Name"] = designation_df["Employee Name"].str.strip()
+    keys = name_keys(designation_df["Employee Name"])
+    repeated = keys.duplicated(keep=False) & keys.notna()
+    duplicates = sorted(designation_df.loc[repeated, "Employee Name"].drop_duplicates(), key=lambda name: str(name).casefold())
+    designation_df.index = pd.Index(keys, name="Name Key")
+    return designation_df[~keys.duplicated().to_numpy() & keys.notna().to_numpy()], duplicates
+
+
+def prepare_designation(designation_df):
+    return index_designation(designation_df)[0]
+
+
+def join_designation(df, designation):
+    """Add the designation columns to each row by a hashed lookup of its name key.
+
+    Unlike a merge, the indexed table has one row per name, so the result
+    always has the rows of ``df`` in their original order.
+    """
+    codes, names = pd.factorize(df["Employee Name"], use_na_sentinel=False)
+    matched = designation.reindex(name_keys(pd.Series(names, dtype=object)).to_numpy())
+    df = df.copy()
+    for column in designation.columns.drop("Employee Name"):
+        df[column] = matched[column].to_numpy()[codes]
+    return df
+
+
+def unmatched_names(names, designation):
+    """Sorted distinct employee names that have no row in the indexed designation table."""
+    names = pd.Series(pd.unique(names.dropna().astype(object)))
+    return sorted(names[~name_keys(names).isin(designation.index)], key=lambda name: str(name).casefold())
+
+
+def parse_duration_to_hours(durations):
+    """Convert a Duration column to hours.
+
+    "HH:MM" strings become fractional hours, plain numbers are kept as-is and
+    anything else (blanks, totals such as "1084:15", unparseable text) is 0.
+    """
+    if pd.api.types.is_numeric_dtype(durations):
+        return durations.astype(float).fillna(0)
+
+    is_text = durations.str.len().notna()
+    parts = durations.where(is_text).str.extract(DURATION_PATTERN).astype(float)
+    hours = parts[0] + parts[1] / 60
+    numbers = pd.to_numeric(durations.where(~is_text), errors="coerce")
+    return hours.fillna(numbers).fillna(0)
+
+
+def normalize_services(services, clients=None, normalize=None):
+    """Apply the Product/Service rules table (``timesheet.rules``) to each distinct (service, client) pair once."""
+    normalize = normalize or compiled_rules()
+    service_codes, service_values = pd.factorize(services, use_na_sentinel=False)
+    if clients is None:
+        client_codes, client_values = np.zeros(len(services), dtype="int64"), [np.nan]
+    else:
+        client_codes, client_values = pd.factorize(clients, use_na_sentinel=False)
+    pair_codes, pairs = pd.factorize(service_codes.astype("int64") * len(client_values) + client_codes)
+    mapped = np.array([
+        normalize(service_values[pair // len(client_values)], client_values[pair % len(client_values)])
+        for pair in pairs
+    ], dtype=object)
+    mapped[pd.isna(mapped)] = np.nan
+    return pd.Series(mapped[pair_codes], index=services.index, name=services.name)
+
+
+def trim_text_columns(df):
+    """Strip surrounding whitespace from every string value, leaving other values untouched."""
+    df = df.copy()
+    for column in df.select_dtypes(include="object").columns:
+        values = df[column]
+        stripped = values.str.strip()
+        df[column] = stripped.where(stripped.notna(), values)
+    return df
+
+
+@staged("clean timesheet")
+def clean_timesheet(df, designation_df=None, base_date=BASE_DATE, engine=None):
+    """Clean a raw export and optionally join a prepared designation frame.
+
+    Produces forward-filled employee names, normalized Product/Service names,
+    datetime activity dates with the calendar columns of ``timesheet.dates``
+    (weeks counted from ``base_date``), Hours and Projects USD. ``engine``
+    (default: the TIMESHEET_ENGINE setting) picks the pandas steps below or
+    the equivalent lazy query of ``timesheet.polars_engine``.
+    """
+    engine = engine or ENGINE
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown cleaning engine {engine!r}; expected one of {', '.join(ENGINES)}")
+    if engine == "polars":
+        from timesheet import polars_engine
+        return polars_engine.clean_timesheet(df, designation_df, base_date)
+
+    df = df.copy()
+    original_columns = df.columns.tolist()
+    if original_columns:
+        df.rename(columns={original_columns[0]: "Employee Name"}, inplace=True)
+
+    if "Employee Name" in df.columns:
+        with stage("employee names"):
+            df["Employee Name"] = df["Employee Name"].ffill()
+            df["Employee Name"] = df["Employee Name"].str.replace(r"^\*", "", regex=True).str.strip()
+
+    if "Product/Service full name" in df.columns:
+        with stage("normalize services"):
+            clients = df["Client full name"] if "Client full name" in df.columns else None
+            df["Product/Service full name"] = normalize_services(df["Product/Service full name"], clients)
+
+    if "Activity date" in df.columns:
+        with stage("dates and calendar columns"):
+            df["Activity date"] = pd.to_datetime(df["Activity date"], format=EXPORT_DATE_FORMAT, errors="coerce")
+            df = add_calendar_columns(df, base_date)
+
+    if designation_df is not None:
+        with stage("designation lookup") as record:
+            df = join_designation(df, designation_df)
+            record["rows"] = len(df)
+
+    if "Duration" in df.columns:
+        with stage("hours and USD"):
+            df["Hours"] = map_unique(df["Duration"], parse_duration_to_hours)
+            if "USD/Hr" in df.columns and "Product/Service full name" in df.columns:
+                is_project = df["Product/Service full name"] == "Projects"
+                df["Projects USD"] = (df["USD/Hr"] * df["Hours"]).where(is_project, 0).round(2)
+
+    return df
@@ -0,0 +1,27 @@
+"""Settings shared by the upload page, the dashboards and batch jobs.
+
+Each setting can be overridden with the environment variable named next to it.
+"""
+import os
+from datetime import datetime
+
+# TIMESHEET_BASE_DATE (dd/mm/yyyy): first day of "Week 1".
+BASE_DATE = datetime.strptime(os.environ.get("TIMESHEET_BASE_DATE", "30/12/2024"), "%d/%m/%Y")
+
+# TIMESHEET_ENGINE: "pandas", or "polars" to clean exports as one lazy polars query (needs the polars package).
+ENGINE = os.environ.get("TIMESHEET_ENGINE", "pandas")
+
+# TIMESHEET_CACHE_DIR: directory of the on-disk cache of cleaned uploads.
+CACHE_DIR = os.environ.get("TIMESHEET_CACHE_DIR", ".timesheet_cache")
+
+# TIMESHEET_CACHE_MB: size limit of that cache; least recently used entries are evicted beyond it.
+CACHE_MAX_MB = float(os.environ.get("TIMESHEET_CACHE_MB", "500"))
+
+# TIMESHEET_PERF=1: record per-stage timings on every page (also enabled per browser tab with ?perf=1).
+PERF_ENABLED = os.environ.get("TIMESHEET_PERF") == "1"
+
+# TIMESHEET_PERF_LOG: JSON-lines file the recorded stages are appended to.
+PERF_LOG = os.environ.get("TIMESHEET_PERF_LOG", "perf_log.jsonl")
+
+# TIMESHEET_SERVICE_RULES: JSON rules table for normalizing Product/Service names (see timesheet.rules).
+SERVICE_RULES = os.environ.get("TIMESHEET_SERVICE_RULES", os.path.join(os.path.dirname(__file__), "service_rules.json"))
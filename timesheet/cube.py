@@ -0,0 +1,40 @@
+"""Pre-aggregated team x employee x week x month x service table built when cleaned data is saved.
+
+The cube keeps the column names of the cleaned frame, so sums of Hours and
+Projects USD and distinct employee counts computed on it match the raw rows
+while touching a fraction of the data. The calendar keys (Week, Month Key,
+Quarter) ride along as dimensions; they follow from the week and month, so
+they add no groups.
+"""
+import pandas as pd
+
+CUBE_DIMENSIONS = [
+    "Team Name", "Employee Name", "Position", "Week", "Week Number", "Month Key", "Month", "Quarter",
+    "Product/Service full name",
+]
+CUBE_MEASURES = ["Hours", "Projects USD"]
+
+
+def build_cube(df):
+    """Aggregate cleaned rows to one row per dimension combination.
+
+    Groups keep the order in which they first appear in ``df``, so lists of
+    employees taken from the cube are in the same order as in the raw data.
+    """
+    df = df.copy(deep=False)
+    dimensions = [column for column in CUBE_DIMENSIONS if column in df.columns]
+    measures = [column for column in CUBE_MEASURES if column in df.columns]
+    df[measures] = df[measures].astype("float64")
+    grouped = df.groupby(dimensions, dropna=False, sort=False, observed=True)
+    cube = grouped[measures].sum()
+    cube["Rows"] = grouped.size()
+    return cube.reset_index()
+
+
+def combine_cubes(cubes):
+    """Merge cubes built from consecutive chunks of the cleaned rows into the cube of all rows."""
+    cubes = pd.concat(cubes, ignore_index=True)
+    dimensions = [column for column in CUBE_DIMENSIONS if column in cubes.columns]
+    measures = [column for column in CUBE_MEASURES if column in cubes.columns]
+    grouped = cubes.groupby(dimensions, dropna=False, sort=False, observed=True)
+    return grouped[measures + ["Rows"]].sum().reset_index()
@@ -0,0 +1,50 @@
+"""Calendar keys derived once per distinct activity date.
+
+Weeks are counted in 7-day blocks from the configured base date: "Week" is
+the integer week (0 for dates before the base date or missing dates) and
+"Week Number" its "Week N" / "Before Week 1" label. "Month Key" (yyyymm) and
+"Quarter" ("2025 Q1") sort chronologically as they are.
+"""
+import numpy as np
+import pandas as pd
+
+from timesheet.config import BASE_DATE
+
+CALENDAR_COLUMNS = ["Week Number", "Week", "Month", "Month Key", "Quarter"]
+
+
+def week_numbers(dates, base_date=BASE_DATE):
+    """Integer week of each date: 1 for the 7 days from ``base_date``, 0 for earlier or missing dates."""
+    days = np.asarray((pd.DatetimeIndex(dates) - pd.Timestamp(base_date)).days, dtype="float64")
+    return np.where(days >= 0, days // 7 + 1, 0).astype("int16")
+
+
+def calendar_table(dates, base_date=BASE_DATE):
+    """Calendar columns for each entry of ``dates`` (a DatetimeIndex or datetime Series, NaT allowed)."""
+    dates = pd.DatetimeIndex(dates)
+    weeks = week_numbers(dates, base_date)
+    labels = np.where(weeks > 0, np.char.add("Week ", weeks.astype(str)), "Before Week 1")
+    return pd.DataFrame({
+        "Week Number": labels.astype(object),
+        "Week": weeks,
+        "Month": dates.strftime("%B %Y"),
+        "Month Key": pd.array(dates.year * 100 + dates.month, dtype="Int32"),
+        "Quarter": dates.to_period("Q").strftime("%Y Q%q"),
+    })
+
+
+def add_calendar_columns(df, base_date=BASE_DATE):
+    """Add the calendar columns for the datetime "Activity date" column, computed per distinct date."""
+    codes, uniques = pd.factorize(df["Activity date"], use_na_sentinel=False)
+    table = calendar_table(uniques, base_date)
+    df = df.copy(deep=False)
+    for column in CALENDAR_COLUMNS:
+        df[column] = table[column].take(codes).array
+    return df
+
+
+def parse_activity_dates(values):
+    """Parse stored dd/mm/yyyy activity-date strings (older cleaned files) into datetimes."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, format="%d/%m/%Y", errors="coerce")
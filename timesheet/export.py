@@ -0,0 +1,85 @@
+"""On-demand downloads of cleaned data and reports as Excel, CSV or Parquet.
+
+Files are only serialized after the user asks for them, and the bytes are
+cached by a hash of the frame's contents and the export options, so reruns
+triggered by unrelated widgets never rebuild a workbook.
+"""
+import hashlib
+from io import BytesIO
+
+import pandas as pd
+import streamlit as st
+import xlsxwriter
+
+from timesheet.perf import staged
+from timesheet.store import _arrow_safe
+
+EXCEL_BLOCK_ROWS = 50_000
+
+FORMATS = {
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def frame_digest(df):
+    """Hash of a frame's column names, dtypes and values."""
+    digest = hashlib.sha1(repr(list(zip(df.columns, map(str, df.dtypes)))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def to_excel_bytes(df, sheet_name="Sheet1"):
+    """Write with xlsxwriter's constant-memory mode, which flushes each finished row to a temp file.
+
+    ``DataFrame.to_excel`` emits cells column by column, which constant-memory
+    mode cannot accept, so rows are streamed here in blocks instead.
+    """
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output, {"constant_memory": True, "default_date_format": "dd/mm/yyyy"})
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(column) for column in df.columns], workbook.add_format({"bold": True, "border": 1}))
+    for start in range(0, len(df), EXCEL_BLOCK_ROWS):
+        block = df.iloc[start:start + EXCEL_BLOCK_ROWS]
+        columns = [block[column].astype(object).where(block[column].notna(), None).tolist() for column in block.columns]
+        for offset, row in enumerate(zip(*columns), start=start + 1):
+            worksheet.write_row(offset, 0, row)
+    workbook.close()
+    return output.getvalue()
+
+
+@staged("build download")
+def to_bytes(df, fmt, sheet_name="Sheet1"):
+    if fmt == "Excel":
+        return to_excel_bytes(df, sheet_name)
+    if fmt == "CSV":
+        return df.to_csv(index=False).encode("utf-8")
+    if fmt == "Parquet":
+        output = BytesIO()
+        _arrow_safe(df).to_parquet(output, index=False)
+        return output.getvalue()
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+@st.cache_data(show_spinner="Preparing download...", max_entries=8)
+def _cached_bytes(digest, fmt, sheet_name, _df):
+    return to_bytes(_df, fmt, sheet_name)
+
+
+def download_section(df, label, file_stem, key, sheet_name="Sheet1"):
+    """Format picker, "Prepare" button and, once prepared for the current data, the download button."""
+    fmt = st.radio("Download format", list(FORMATS), horizontal=True, key=f"{key}_format")
+    digest = frame_digest(df)
+    if st.button(f"Prepare {fmt} file", key=f"{key}_prepare"):
+        st.session_state[f"{key}_prepared"] = (digest, fmt)
+    if st.session_state.get(f"{key}_prepared") != (digest, fmt):
+        return
+    extension, mime = FORMATS[fmt]
+    st.download_button(
+        label=label,
+        data=_cached_bytes(digest, fmt, sheet_name, df),
+        file_name=f"{file_stem}.{extension}",
+        mime=mime,
+        key=f"{key}_download",
+    )
@@ -0,0 +1,98 @@
+"""Incremental refresh of the stored timesheet from a re-exported file.
+
+Each week of the raw export is fingerprinted (row count plus an
+order-independent sum of row hashes) and compared with the fingerprints
+recorded at the last refresh, so only new or changed weeks are cleaned and
+merged into the stored rows and cube. Weeks missing from the upload are kept,
+since an export may cover only recent weeks. A different designation file,
+base date or service rules table, or a store saved since the last refresh,
+triggers a full rebuild.
+"""
+import hashlib
+import json
+
+import pandas as pd
+
+from timesheet.cleaning import EXPORT_DATE_FORMAT, clean_timesheet
+from timesheet.config import BASE_DATE
+from timesheet.dates import week_numbers
+from timesheet.export import frame_digest
+from timesheet.rules import rules_digest
+from timesheet.perf import staged
+from timesheet.store import CLEANED_STORE, CUBE_PARQUET, _replacing, replace_weeks, save_cleaned, store_version
+
+MANIFEST_JSON = "cleaned_manifest.json"
+
+
+def week_fingerprints(raw, base_date=BASE_DATE):
+    """Return the week of each raw row and ``{week: fingerprint}`` for a raw export with forward-filled names."""
+    dates = pd.to_datetime(raw["Activity date"], format=EXPORT_DATE_FORMAT, errors="coerce")
+    weeks = pd.Series(week_numbers(dates, base_date), index=raw.index)
+    grouped = pd.util.hash_pandas_object(raw, index=False).groupby(weeks)
+    sums, counts = grouped.sum(), grouped.size()
+    return weeks, {str(week): f"{counts[week]}:{sums[week]}" for week in counts.index}
+
+
+def _options_digest(designation_df, base_date):
+    designation = frame_digest(designation_df) if designation_df is not None else ""
+    return hashlib.sha1(f"{designation}|{pd.Timestamp(base_date).date()}|{rules_digest()}".encode()).hexdigest()
+
+
+def _read_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_key(path):
+    """``store_version`` of the store in the form it takes in the JSON manifest, or None."""
+    version = store_version(path)
+    return None if version is None else [list(entry) for entry in version]
+
+
+def _write_manifest(manifest, path):
+    with _replacing(path) as tmp_path, open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+
+
+@staged("incremental ingest")
+def ingest_incremental(raw, designation_df=None, base_date=BASE_DATE,
+                       path=CLEANED_STORE, cube_path=CUBE_PARQUET, manifest_path=MANIFEST_JSON):
+    """Clean and store only the weeks of the raw export ``raw`` that are new or changed since the last refresh.
+
+    Returns a summary dict: "full" (everything was rebuilt), the "new" and
+    "changed" week numbers, the number of "unchanged" weeks and the "rows" cleaned.
+    """
+    raw = raw.copy(deep=False)
+    raw[raw.columns[0]] = raw.iloc[:, 0].ffill()
+    weeks, fingerprints = week_fingerprints(raw, base_date)
+    options = _options_digest(designation_df, base_date)
+
+    manifest = _read_manifest(manifest_path)
+    stored_key = _store_key(path)
+    full = (
+        manifest is None or stored_key is None
+        or manifest.get("options") != options or manifest.get("store") != stored_key
+    )
+    known = {} if full else manifest["weeks"]
+    new = sorted(int(week) for week in fingerprints if week not in known)
+    changed = sorted(int(week) for week, fingerprint in fingerprints.items() if week in known and known[week] != fingerprint)
+
+    if full:
+        rows = clean_timesheet(raw, designation_df, base_date)
+        save_cleaned(rows, path, cube_path)
+    elif new or changed:
+        rows = clean_timesheet(raw[weeks.isin(new + changed)], designation_df, base_date)
+        replace_weeks(rows, new + changed, path, cube_path)
+    else:
+        rows = raw.iloc[0:0]
+
+    _write_manifest(
+        {"options": options, "store": _store_key(path), "weeks": {**known, **fingerprints}}, manifest_path
+    )
+    return {
+        "full": full, "new": new, "changed": changed,
+        "unchanged": len(fingerprints) - len(new) - len(changed), "rows": len(rows),
+    }
@@ -0,0 +1,145 @@
+"""Team insight tables for every team, computed together from the aggregate cube.
+
+``compute_insights`` groups by team once per table instead of filtering the
+data once per team page, and ``load_shared_insights`` caches the result for
+all sessions, so each "& Team Insights" page only looks up its own entry.
+"""
+import streamlit as st
+
+from timesheet.metrics import HOURS_PER_WEEK, SERVICE, employee_weeks, weekly_utilization, with_service_hours
+from timesheet.perf import staged
+from timesheet.store import data_version, load_shared_cube, load_shared_employee_weeks
+
+TEAM = "Team Name"
+EMPLOYEE = "Employee Name"
+
+# Page title and "Target vs Achieved" target for each team insights page.
+TEAMS = {
+    "Sagar & Team": {"title": "Sagar & Team", "target": 1749439.06},
+    "Vinoth & Team": {"title": "Vinoth & Team", "target": 1637466.64},
+    "Dr. Suresh & Team": {"title": "Dr Suresh & Team", "target": 1675859.65},
+    "Praveen & Team": {"title": "Praveen & Team", "target": 2783710.62},
+    "Jigar & Team": {"title": "Jigar & Team", "target": 695927.66},
+    "Dr. Amritpal Singh & Team": {"title": "Dr Amritpal Singh & Team", "target": 457596.29},
+}
+
+
+def _split(table, teams, keep_team=False):
+    """Split a table with a Team Name column into {team: rows}, with an empty frame for teams without rows."""
+    if not keep_team:
+        table = table.set_index(TEAM)
+    groups = dict(tuple(table.groupby(table[TEAM] if keep_team else table.index, sort=False, observed=True)))
+    empty = table.iloc[0:0]
+    return {team: groups.get(team, empty).reset_index(drop=True) for team in teams}
+
+
+def _latest_week_tables(latest, latest_facts, teams):
+    employees = latest_facts.groupby([TEAM, EMPLOYEE], sort=False, observed=True)
+    productivity = employees["Project Hours"].sum().rename("Hours").reset_index()
+
+    team_available = (
+        latest.groupby(TEAM, observed=True)[EMPLOYEE].nunique() * HOURS_PER_WEEK
+        - latest.groupby(TEAM, observed=True)["Time Off"].sum()
+    ).rename("Available")
+    working = latest[latest[SERVICE] != "Time off"]
+    services = working.groupby([TEAM, SERVICE], observed=True)["Hours"].sum().reset_index()
+    services = services.join(team_available, on=TEAM)
+    services["% of Available Time"] = (services["Hours"] / services["Available"] * 100).round(2)
+
+    positions = working[working["Position"].notna()].groupby([TEAM, "Position", SERVICE], observed=True)["Hours"].sum().reset_index()
+    headcount = latest.groupby([TEAM, "Position"], observed=True)[EMPLOYEE].nunique().rename("Headcount").reset_index()
+    time_off = latest[latest[SERVICE] == "Time off"]
+    position_time_off = time_off.groupby([TEAM, "Position"], observed=True)["Hours"].sum().rename("Time Off").reset_index()
+    positions = positions.merge(headcount, on=[TEAM, "Position"], how="left")
+    positions = positions.merge(position_time_off, on=[TEAM, "Position"], how="left")
+    positions["Time Off"] = positions["Time Off"].fillna(0)
+    positions["Available"] = positions["Headcount"] * HOURS_PER_WEEK - positions["Time Off"]
+    positions["% of Available Time"] = (positions["Hours"] / positions["Available"] * 100).round(2)
+
+    time_off_by_employee = time_off.groupby([TEAM, "Position", EMPLOYEE], observed=True)["Hours"].sum().reset_index()
+
+    return {
+        "productivity": _split(productivity, teams),
+        "services": _split(services.drop(columns="Available"), teams),
+        "positions": _split(positions, teams),
+        "time_off": _split(time_off_by_employee, teams),
+    }
+
+
+def _overall_tables(df, valid, facts, teams):
+    by_team = df.groupby(TEAM, observed=True)
+    weeks = df[valid].groupby(TEAM, observed=True)["Week Number"].nunique()
+    available = by_team[EMPLOYEE].nunique() * HOURS_PER_WEEK * weeks.reindex(by_team.size().index, fill_value=0)
+    available = (available - by_team["Time Off"].sum()).rename("Available")
+    overall = df[df[SERVICE] != "Time off"].groupby([TEAM, SERVICE], observed=True)["Hours"].sum().reset_index()
+    overall = overall.join(available, on=TEAM)
+    overall["% of Available Time"] = (overall["Hours"] / overall["Available"] * 100).round(2)
+
+    employees = facts.groupby([TEAM, EMPLOYEE], sort=False, observed=True).agg(
+        Weeks=("Week", "nunique"), TimeOff=("Time Off", "sum"), Project=("Project Hours", "sum")
+    )
+    employee_available = employees["Weeks"] * HOURS_PER_WEEK - employees["TimeOff"]
+    individual = (employees["Project"] / employee_available.where(employee_available > 0) * 100).fillna(0).round(2)
+    individual = individual.rename("% Project Time").reset_index()
+
+    achieved = df.loc[df[SERVICE] == "Projects"].groupby(TEAM, observed=True)["Projects USD"].sum()
+    return {
+        "overall": _split(overall.drop(columns="Available"), teams),
+        "individual": {team: rows.sort_values("% Project Time") for team, rows in _split(individual, teams).items()},
+        "achieved": {team: achieved.get(team, 0.0) for team in teams},
+    }
+
+
+@staged("compute team insights")
+def compute_insights(df, facts=None):
+    """Compute every team's insight tables from the cube (or cleaned rows).
+
+    Per-employee figures come from ``facts``, the ``employee_weeks`` table of
+    ``df``, which is built here when not given.
+
+    Returns ``{team: {name: value}}`` with the team's rows ("rows"), its latest
+    week label ("latest_week"), last-week tables ("productivity", "services",
+    "positions", "time_off"), the weekly "trend", the "overall" service
+    breakdown, per-employee project % ("individual"), "achieved" USD and the
+    row positions of each employee in the team's rows ("employees").
+    """
+    rows = df[df[TEAM].notna()]
+    if facts is None:
+        facts = employee_weeks(rows)
+    facts = facts[facts[TEAM].notna()]
+    df = with_service_hours(rows)
+    valid = df["Week"] > 0
+    team_latest = df["Week"].where(valid).groupby(df[TEAM], observed=True).transform("max")
+    latest = df[valid & (df["Week"] == team_latest)]
+    latest_weeks = latest.groupby(TEAM, observed=True)["Week Number"].first().to_dict()
+    latest_facts = facts[facts["Week"] == facts["Week"].where(facts["Week"] > 0).groupby(facts[TEAM], observed=True).transform("max")]
+
+    teams = list(latest_weeks)
+    trend = weekly_utilization(df[valid], teams).rename(columns={"Team": TEAM, "Project %": "% Projects"})
+    tables = {
+        "rows": _split(rows, teams, keep_team=True),
+        "trend": _split(trend[[TEAM, "Week", "% Projects"]], teams),
+        **_latest_week_tables(latest, latest_facts, teams),
+        **_overall_tables(df, valid, facts, teams),
+    }
+    tables["employees"] = {
+        team: team_rows.groupby(EMPLOYEE, observed=True).indices for team, team_rows in tables["rows"].items()
+    }
+    return {
+        team: {"latest_week": latest_weeks[team], **{name: table[team] for name, table in tables.items()}}
+        for team in teams
+    }
+
+
+@st.cache_resource(show_spinner="Computing team insights...", max_entries=2)
+def _load_shared_insights(file_key):
+    cube = load_shared_cube()
+    return compute_insights(cube, load_shared_employee_weeks()) if cube is not None else {}
+
+
+def load_shared_insights():
+    """Return ``compute_insights`` for the current cube, computed once and shared by all team pages."""
+    file_key = data_version()
+    if file_key is None:
+        return {}
+    return _load_shared_insights(file_key)
@@ -0,0 +1,120 @@
+"""Background jobs for long ingest work on the upload page.
+
+A job runs a function on a daemon thread and keeps its latest progress
+(fraction done, message and the ``perf`` stage running) and, once the
+function returns, its result or error. Jobs are kept in the session state
+with a key describing their inputs, so the reruns triggered by widgets find
+the running job instead of starting the work again. The result becomes
+visible only once the whole function has finished.
+"""
+import threading
+import time
+
+import streamlit as st
+
+from timesheet import perf
+
+POLL_SECONDS = 0.5
+
+
+class Job:
+    """``target(*args, progress=job.progress, **kwargs)`` running on a background thread."""
+
+    def __init__(self, target, *args, **kwargs):
+        self.fraction = 0.0
+        self.message = "Starting..."
+        self.stage = None
+        self.started = time.monotonic()
+        self._result = None
+        self._error = None
+        self._done = threading.Event()
+        # Recorded for the page whose script run created the job, shown by a later run once done
+        self._stages = []
+        self._perf_page = perf.recording_page()
+        thread = threading.Thread(target=self._run, args=(target, args, kwargs), daemon=True)
+        thread.start()
+
+    def progress(self, fraction=None, message=None):
+        """Report progress from the job's function; ``fraction`` runs from 0 to 1."""
+        if fraction is not None:
+            self.fraction = min(max(float(fraction), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def _set_stage(self, name):
+        self.stage = name
+
+    def _run(self, target, args, kwargs):
+        try:
+            with perf.listen(self._set_stage), perf.recording(self._perf_page) as self._stages:
+                with perf.stage(f"background job: {getattr(target, '__name__', 'job')}"):
+                    result = target(*args, progress=self.progress, **kwargs)
+        except Exception as error:
+            self._error = error
+        else:
+            self._result = result
+            self.fraction = 1.0
+        finally:
+            self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def error(self):
+        return self._error
+
+    def take_stages(self):
+        """The ``perf`` stages the job recorded, returned once (an empty list afterwards or while it runs)."""
+        if not self.done:
+            return []
+        stages, self._stages = self._stages, []
+        return stages
+
+    def result(self):
+        """The function's return value once ``done``; re-raises the exception it failed with."""
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def session_job(name, key, target, *args, restart=False, **kwargs):
+    """Return the job kept as ``name`` in this session if it was started for ``key``, else start it.
+
+    With ``restart``, a finished job for the same key is run again; a running
+    one is never started twice.
+    """
+    current = st.session_state.get(name)
+    if current is not None and current[0] == key and not (restart and current[1].done):
+        return current[1]
+    job = Job(target, *args, **kwargs)
+    st.session_state[name] = (key, job)
+    return job
+
+
+def current_job(name, key):
+    """The job kept as ``name`` if it was started for ``key``, else None."""
+    current = st.session_state.get(name)
+    return current[1] if current is not None and current[0] == key else None
+
+
+def wait_for(job, label):
+    """While ``job`` runs, show its progress and stop the script run; the page reruns when it finishes.
+
+    The first run that finds the job done adds the job's ``perf`` stages to its own.
+    """
+    if job.done:
+        perf.merge(job.take_stages())
+        return
+
+    @st.fragment(run_every=POLL_SECONDS)
+    def progress_bar():
+        if job.done:
+            st.rerun()
+        stage = f" ({job.stage})" if job.stage else ""
+        st.progress(job.fraction, text=f"{label}: {job.message}{stage}, {time.monotonic() - job.started:.0f}s")
+
+    progress_bar()
+    perf.panel()
+    st.stop()
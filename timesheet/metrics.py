@@ -0,0 +1,118 @@
+"""Grouped utilization metrics shared by the dashboard pages.
+
+Each function takes the cleaned rows or the aggregate cube (both carry Team
+Name, Employee Name, Week, Week Number, Product/Service full name and Hours) and
+computes every team and week in one grouped pass, returning a tidy frame that
+the Plotly charts can plot directly.
+"""
+import pandas as pd
+
+from timesheet.perf import staged
+
+HOURS_PER_WEEK = 40
+SERVICE = "Product/Service full name"
+
+
+def ordered_labels(df, label="Week Number", key="Week"):
+    """Distinct values of ``label`` in the order of their integer ``key`` column (e.g. weeks, months)."""
+    labels = df[[key, label]].dropna().drop_duplicates(key).sort_values(key)
+    return labels[label].tolist()
+
+
+def latest_week_label(df):
+    """Label of the most recent week in ``df``, ignoring "Before Week 1", or None."""
+    weeks = df.loc[df["Week"] > 0, ["Week", "Week Number"]]
+    if weeks.empty:
+        return None
+    return weeks.loc[weeks["Week"].idxmax(), "Week Number"]
+
+
+def with_service_hours(df):
+    """Add "Time Off" and "Project Hours" columns holding each row's Hours for those services, else 0."""
+    hours = df["Hours"]
+    return df.assign(**{
+        "Time Off": hours.where(df[SERVICE] == "Time off", 0),
+        "Project Hours": hours.where(df[SERVICE] == "Projects", 0),
+    })
+
+
+@staged("employee weeks")
+def employee_weeks(df):
+    """Employee x week fact table, one row per team, employee, position and week.
+
+    Holds the week's Hours, Project Hours, Time Off, Available Hours (40 less
+    time off) and Project % of available hours, all from one grouped pass.
+    Rows without a team or position are kept, with those keys missing.
+    """
+    keys = ["Team Name", "Employee Name", "Position", "Week", "Week Number"]
+    df = with_service_hours(df)
+    facts = df.groupby(keys, observed=True, dropna=False, sort=False)[["Hours", "Project Hours", "Time Off"]].sum()
+    facts = facts.reset_index()
+    facts["Available Hours"] = HOURS_PER_WEEK - facts["Time Off"]
+    available = facts["Available Hours"].where(facts["Available Hours"] > 0)
+    facts["Project %"] = (facts["Project Hours"] / available * 100).fillna(0).round(2)
+    return facts
+
+
+@staged("weekly utilization")
+def weekly_utilization(df, teams):
+    """Project % of available hours per team and week.
+
+    Available hours are 40 per active employee less time off. Rows come out in
+    ``teams`` order, then by week number.
+    """
+    df = with_service_hours(df[df["Team Name"].isin(teams)])
+    trend = df.groupby(["Team Name", "Week", "Week Number"], observed=True).agg(
+        **{
+            "Employees": ("Employee Name", "nunique"),
+            "Time Off": ("Time Off", "sum"),
+            "Project Hours": ("Project Hours", "sum"),
+        }
+    ).reset_index()
+    trend["Available Hours"] = trend["Employees"] * HOURS_PER_WEEK - trend["Time Off"]
+    available = trend["Available Hours"].where(trend["Available Hours"] > 0)
+    trend["Project %"] = (trend["Project Hours"] / available * 100).fillna(0).round(2)
+
+    team_order = pd.Categorical(trend["Team Name"], categories=list(teams), ordered=True).codes
+    trend = trend.assign(_team=team_order).sort_values(["_team", "Week"], kind="stable")
+    trend = trend.drop(columns=["_team", "Week"])
+    return trend.rename(columns={"Team Name": "Team", "Week Number": "Week"}).reset_index(drop=True)
+
+
+@staged("service share")
+def service_share(df, teams, week=None):
+    """Hours per Product/Service (excluding time off) as a % of the teams' available hours.
+
+    A team's available hours are the hours it logged less its time off. Pass
+    ``week`` to restrict to a single week.
+    """
+    df = df[df["Team Name"].isin(teams)]
+    if week is not None:
+        df = df[df["Week Number"] == week]
+    available = df["Hours"].sum() - df.loc[df[SERVICE] == "Time off", "Hours"].sum()
+    summary = df[df[SERVICE] != "Time off"].groupby(SERVICE, observed=True)["Hours"].sum().reset_index()
+    summary["% of Time"] = (summary["Hours"] / available * 100).round(2)
+    return summary
+
+
+@staged("weekly hours shortfall")
+def weekly_hours_shortfall(df, threshold=HOURS_PER_WEEK):
+    """Employee weeks with fewer than ``threshold`` logged hours, including weeks with no entries.
+
+    Takes the ``employee_weeks`` fact table (or any rows with its key columns).
+    Only employees with a Position are checked, against every "Week N" present
+    in ``df``. Hours are pivoted to an employee x week matrix and only the cells
+    under the threshold are turned back into rows, so the output grows with the
+    number of shortfalls rather than employees x weeks.
+    """
+    keys = ["Employee Name", "Team Name", "Position"]
+    df = df[df["Position"].notna() & (df["Position"].astype(str).str.strip() != "")]
+    df = df[df["Week"] > 0]
+
+    weekly = df.groupby(keys + ["Week"], observed=True)["Hours"].sum().unstack("Week", fill_value=0)
+    shortfall = weekly.where(weekly < threshold).stack(future_stack=True).dropna().rename("Hours").reset_index()
+    shortfall = shortfall.sort_values(["Week", "Employee Name"], kind="stable")
+
+    week_labels = df.drop_duplicates("Week").set_index("Week")["Week Number"]
+    shortfall.insert(len(keys), "Week Number", shortfall["Week"].map(week_labels).astype(object))
+    return shortfall.drop(columns="Week").reset_index(drop=True)
@@ -0,0 +1,178 @@
+"""Opt-in per-stage instrumentation: wall time, row count and peak memory.
+
+A page calls ``begin`` at the top and ``panel`` at the bottom; in between,
+every ``stage`` block or ``staged`` function run by that script run
+(including those inside the library) is recorded. ``panel`` shows the stages
+in a collapsible sidebar panel and appends them to ``PERF_LOG``. When
+instrumentation is off (the default), ``stage`` costs two attribute lookups.
+``listen`` reports stage names as they start, e.g. as progress of a job, and
+``recording`` records the stages of a job for the page that started it.
+
+Peak memory is the tracemalloc peak of Python allocations during the stage
+(numpy and pandas buffers included); tracing slows allocation-heavy code, so
+absolute timings are best compared between instrumented runs only. Tracing
+runs only while some thread is recording. Its peak is process-wide, though:
+stages of other sessions recording at the same time reset it and add their
+own allocations, so peak memory is only reliable for a run recorded alone.
+"""
+import functools
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from timesheet.config import PERF_ENABLED, PERF_LOG
+
+# Streamlit runs each session's script in its own thread
+_local = threading.local()
+
+# Threads recording stages; tracemalloc is on while there is any
+_recording_threads = set()
+_tracing_lock = threading.Lock()
+
+
+def _set_recording(recording):
+    """Count this thread in or out of the recording threads and start or stop tracemalloc to match.
+
+    A script run stopped early (``st.stop``) never reaches ``panel``, so
+    threads that have ended are dropped from the count as well.
+    """
+    thread = threading.current_thread()
+    with _tracing_lock:
+        if recording:
+            _recording_threads.add(thread)
+        else:
+            _recording_threads.discard(thread)
+        _recording_threads.difference_update([other for other in _recording_threads if not other.is_alive()])
+        if _recording_threads and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not _recording_threads and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def begin(page):
+    """Start recording stages for this script run if instrumentation is on (env var or ``?perf=1``)."""
+    enabled = PERF_ENABLED or st.query_params.get("perf") == "1"
+    _set_recording(enabled)
+    if not enabled:
+        _local.records = None
+        return
+    _start(page)
+
+
+def _start(page):
+    _local.page = page
+    _local.records = []
+    _local.stack = []
+    _local.child_peaks = {}
+
+
+def recording_page():
+    """The page this thread is recording stages for, or None; captured when a background job is created."""
+    return _local.page if getattr(_local, "records", None) is not None else None
+
+
+@contextmanager
+def recording(page):
+    """Record the stages of the block on this thread for ``page`` (None records nothing); yields their list.
+
+    For background jobs, whose stages run outside the script run that
+    started them; a later run of the page adds them to its own with ``merge``.
+    """
+    if page is None:
+        yield []
+        return
+    _set_recording(True)
+    _start(page)
+    records = _local.records
+    try:
+        yield records
+    finally:
+        _local.records = None
+        _set_recording(False)
+
+
+def merge(records):
+    """Add stages recorded elsewhere (``recording``) to this script run's, to be shown by ``panel``."""
+    if records and getattr(_local, "records", None) is not None:
+        _local.records.extend(records)
+
+
+@contextmanager
+def listen(callback):
+    """Call ``callback(name)`` whenever a stage starts on this thread inside the block."""
+    previous = getattr(_local, "listener", None)
+    _local.listener = callback
+    try:
+        yield
+    finally:
+        _local.listener = previous
+
+
+@contextmanager
+def stage(name):
+    """Record the block as a stage; set ``record["rows"]`` inside it to report a row count."""
+    listener = getattr(_local, "listener", None)
+    if listener is not None:
+        listener(name)
+    records = getattr(_local, "records", None)
+    if records is None:
+        yield {}
+        return
+    record = {"stage": name, "depth": len(_local.stack), "rows": None}
+    records.append(record)
+    _local.stack.append(record)
+    start_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    peaks = _local.child_peaks
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = round(time.perf_counter() - started, 4)
+        # Nested stages reset the tracemalloc peak, so each hands its peak on to its parent
+        peak = max(tracemalloc.get_traced_memory()[1], peaks.pop(id(record), 0))
+        record["peak_mb"] = round((peak - start_memory) / 1e6, 2)
+        _local.stack.pop()
+        if _local.stack:
+            parent = id(_local.stack[-1])
+            peaks[parent] = max(peaks.get(parent, 0), peak)
+        tracemalloc.reset_peak()
+
+
+def staged(name):
+    """Decorator recording each call as a stage, with the length of the returned frame as its rows."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as record:
+                result = func(*args, **kwargs)
+                if isinstance(result, (pd.DataFrame, pd.Series)):
+                    record["rows"] = len(result)
+                return result
+        return wrapper
+    return decorator
+
+
+def panel():
+    """Show this run's stages in the sidebar and append them to the JSON-lines log."""
+    records = getattr(_local, "records", None)
+    if records is None:
+        return
+    _local.records = None
+    _set_recording(False)
+    timestamp = datetime.now().isoformat(timespec="seconds")
+    with open(PERF_LOG, "a") as log:
+        for record in records:
+            log.write(json.dumps({"time": timestamp, "page": _local.page, **record}) + "\n")
+
+    table = pd.DataFrame(records, columns=["stage", "depth", "seconds", "rows", "peak_mb"])
+    table["stage"] = [" " * depth + name for depth, name in zip(table["depth"], table["stage"])]
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        st.dataframe(table.drop(columns="depth"), hide_index=True, use_container_width=True)
+        st.caption("Peak memory is process-wide; it is unreliable while other sessions record at the same time.")
@@ -0,0 +1,180 @@
+"""The cleaning pipeline of ``cleaning.clean_timesheet`` as a single lazy polars query.
+
+Selected with TIMESHEET_ENGINE=polars. Every step (name fill, service rules,
+date parsing, calendar columns, designation lookup, hours and USD) becomes an
+expression of one query plan, which polars optimizes and runs on all cores,
+materializing only the final frame. The result matches the pandas engine.
+polars is optional and only needed when this engine is selected.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import polars as pl
+except ImportError:  # optional dependency
+    pl = None
+
+from timesheet.cleaning import DURATION_PATTERN, EXPORT_DATE_FORMAT
+from timesheet.config import BASE_DATE
+from timesheet.perf import staged
+from timesheet.rules import load_rules, rule_steps
+from timesheet.store import _arrow_safe
+
+
+# Columns the pandas engine reads through string methods, which turn non-text values into missing ones.
+TEXT_METHOD_COLUMNS = ["Employee Name", "Product/Service full name", "Duration"]
+
+# Columns the query rewrites; the others are passed through as read.
+CLEANED_COLUMNS = ["Employee Name", "Product/Service full name", "Activity date"]
+
+DURATION_NUMBERS = "_Duration numbers"
+
+
+def _is_mixed(values):
+    return pd.api.types.infer_dtype(values, skipna=True) in ("mixed", "mixed-integer")
+
+
+def _is_text_column(column):
+    return f"_{column} is text"
+
+
+def _from_pandas(df):
+    """``df`` as a lazy polars query, keeping which values of mixed object columns were text.
+
+    ``_arrow_safe`` turns the numbers in a column that also holds text into
+    text, but the pandas engine treats them as missing in the columns of
+    TEXT_METHOD_COLUMNS, and keeps the plain numbers of Duration as hours.
+    Such columns get a flag column of their text values (missing where the
+    value is), and Duration its non-text values as numbers.
+    """
+    extra = {}
+    for column in TEXT_METHOD_COLUMNS:
+        if column in df.columns and _is_mixed(df[column]):
+            is_text = df[column].str.len().notna()
+            extra[_is_text_column(column)] = is_text.astype("boolean").mask(df[column].isna())
+            if column == "Duration":
+                extra[DURATION_NUMBERS] = pd.to_numeric(df[column].where(~is_text), errors="coerce")
+    return pl.from_pandas(_arrow_safe(df).assign(**extra)).lazy()
+
+
+def _text(schema, column, forward_fill=False):
+    """The column as text; non-text values become missing, as pandas string methods make them.
+
+    With ``forward_fill``, missing values are filled from the previous value
+    first, so a non-text value also blanks the rows it is carried into.
+    """
+    if schema[column] != pl.String:
+        return pl.lit(None, dtype=pl.String)
+    values = pl.col(column)
+    if _is_text_column(column) not in schema:
+        return values.forward_fill() if forward_fill else values
+    is_text = pl.col(_is_text_column(column))
+    if forward_fill:
+        values, is_text = values.forward_fill(), is_text.forward_fill()
+    return pl.when(is_text).then(values)
+
+
+def service_expression(steps, service, client):
+    """The rules steps of ``timesheet.rules`` as one when/then expression over the service and client columns."""
+    client = client.fill_null("")
+    branches = []
+    for kind, value, target in steps:
+        if kind == "client_prefix":
+            branches.append((client.str.starts_with(value), target))
+        elif kind == "strip_prefix":
+            service = pl.when(service.str.starts_with(value)).then(service.str.slice(len(value))).otherwise(service)
+        elif kind == "prefix":
+            branches.append((service.str.strip_chars().str.starts_with(value), target))
+        else:
+            branches.append((service.str.strip_chars().is_in(sorted(value)), target))
+    expression = service.str.strip_chars()
+    for condition, target in reversed(branches):
+        expression = pl.when(condition).then(pl.lit(target)).otherwise(expression)
+    return expression
+
+
+def name_key(names):
+    """Normalized employee names for the designation lookup, as in ``cleaning.name_keys``."""
+    return names.str.replace_all(r"\s+", " ").str.strip_chars().str.to_lowercase()
+
+
+def _calendar_columns(date, base_date):
+    days = (date - pl.lit(pd.Timestamp(base_date).to_pydatetime())).dt.total_days()
+    week = pl.when(days >= 0).then(days // 7 + 1).otherwise(0).cast(pl.Int16)
+    return [
+        pl.when(week > 0).then(pl.format("Week {}", week)).otherwise(pl.lit("Before Week 1")).alias("Week Number"),
+        week.alias("Week"),
+        date.dt.strftime("%B %Y").alias("Month"),
+        (date.dt.year() * 100 + date.dt.month()).cast(pl.Int32).alias("Month Key"),
+        pl.format("{} Q{}", date.dt.year(), date.dt.quarter()).alias("Quarter"),
+    ]
+
+
+def _hours(schema):
+    duration = pl.col("Duration")
+    if schema["Duration"].is_numeric():
+        return duration.cast(pl.Float64).fill_nan(None).fill_null(0)
+    parts = _text(schema, "Duration").str.extract_groups(DURATION_PATTERN)
+    hours = parts.struct.field("1").cast(pl.Float64) + parts.struct.field("2").cast(pl.Float64) / 60
+    if DURATION_NUMBERS in schema:
+        hours = hours.fill_null(pl.col(DURATION_NUMBERS))
+    return hours.fill_null(0)
+
+
+@staged("clean timesheet (polars)")
+def clean_timesheet(df, designation_df=None, base_date=BASE_DATE):
+    """Clean a raw export like ``cleaning.clean_timesheet``, built lazily and collected once."""
+    if pl is None:
+        raise ImportError("TIMESHEET_ENGINE=polars needs the polars package (pip install polars).")
+    if len(df.columns):
+        df = df.rename(columns={df.columns[0]: "Employee Name"})
+    query = _from_pandas(df)
+    schema = query.collect_schema()
+
+    if "Employee Name" in schema:
+        names = _text(schema, "Employee Name", forward_fill=True)
+        query = query.with_columns(names.str.replace(r"^\*", "").str.strip_chars().alias("Employee Name"))
+
+    if "Product/Service full name" in schema:
+        clients = pl.col("Client full name").cast(pl.String) if "Client full name" in schema else pl.lit("")
+        services = service_expression(rule_steps(load_rules()), _text(schema, "Product/Service full name"), clients)
+        query = query.with_columns(services.alias("Product/Service full name"))
+
+    if "Activity date" in schema:
+        if schema["Activity date"] == pl.String:
+            date = pl.col("Activity date").str.strptime(pl.Datetime("ns"), EXPORT_DATE_FORMAT, strict=False)
+        else:
+            date = pl.col("Activity date").cast(pl.Datetime("ns"))
+        query = query.with_columns(date.alias("Activity date"))
+        query = query.with_columns(_calendar_columns(pl.col("Activity date"), base_date))
+
+    if designation_df is not None:
+        lookup = (
+            pl.from_pandas(_arrow_safe(designation_df.reset_index(drop=True))).lazy()
+            .with_columns(name_key(pl.col("Employee Name")).alias("_key"))
+            .drop("Employee Name")
+            .unique("_key", keep="first", maintain_order=True)
+        )
+        query = query.with_columns(name_key(pl.col("Employee Name")).alias("_key"))
+        query = query.join(lookup, on="_key", how="left", maintain_order="left").drop("_key")
+
+    if "Duration" in schema:
+        query = query.with_columns(_hours(schema).alias("Hours"))
+        if "USD/Hr" in query.collect_schema() and "Product/Service full name" in schema:
+            is_project = pl.col("Product/Service full name") == "Projects"
+            usd = (pl.col("USD/Hr") * pl.col("Hours")).round(2)
+            query = query.with_columns(pl.when(is_project).then(usd).otherwise(0.0).alias("Projects USD"))
+
+    helpers = [column for column in (DURATION_NUMBERS, *map(_is_text_column, TEXT_METHOD_COLUMNS)) if column in schema]
+    result = query.drop(helpers).collect().to_pandas()
+    for column in result.select_dtypes(include="object").columns:
+        values = result[column].to_numpy(copy=True)
+        values[pd.isna(values)] = np.nan
+        result[column] = values
+    # Passed-through mixed columns keep their original values, which ``_arrow_safe`` turned into text
+    for column in df.columns.difference(CLEANED_COLUMNS):
+        if df[column].dtype == object and _is_mixed(df[column]):
+            result[column] = df[column].to_numpy()
+    if "Month Key" in result.columns:
+        result["Month Key"] = result["Month Key"].astype("Int32")
+    return result
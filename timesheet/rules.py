@@ -0,0 +1,88 @@
+"""Declarative Product/Service normalization rules.
+
+The rules table (``service_rules.json``, or the file named by
+TIMESHEET_SERVICE_RULES) is a JSON list of rules, applied in ascending
+``priority`` to each (service, client) pair:
+
+- ``{"match": "client_prefix", "value": "Enerzinx LLC:", "to": "Internal Billable"}``:
+  the client name starts with ``value``; the service becomes ``to``.
+- ``{"match": "strip_prefix", "value": "Internal:"}``: remove ``value`` from the
+  start of the service name and carry on with the next rule.
+- ``{"match": "prefix", "value": "Time off:", "to": "Time off"}``: the service
+  name starts with ``value``.
+- ``{"match": "exact", "value": ["Rates:Intern", ...], "to": "Projects"}``: the
+  service name is one of ``value``.
+
+The first matching ``to`` rule wins; otherwise the service keeps its
+(rewritten) name. Surrounding whitespace is ignored for matching and removed
+from the result. The table is compiled once per file version.
+"""
+import functools
+import hashlib
+import json
+import os
+
+from timesheet.config import SERVICE_RULES
+
+MATCH_KINDS = ("client_prefix", "strip_prefix", "prefix", "exact")
+
+
+def load_rules(path=SERVICE_RULES):
+    with open(path) as f:
+        return json.load(f)
+
+
+def rules_digest(path=SERVICE_RULES):
+    """Hash of the rules file, for caches of cleaned data."""
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def rule_steps(rules):
+    """Validate a rules table and return its ``(kind, value, to)`` steps in priority order."""
+    steps = []
+    for rule in sorted(rules, key=lambda rule: rule.get("priority", 0)):
+        kind = rule["match"]
+        if kind not in MATCH_KINDS:
+            raise ValueError(f"Unknown service rule match {kind!r}; expected one of {', '.join(MATCH_KINDS)}")
+        if kind != "strip_prefix" and "to" not in rule:
+            raise ValueError(f"Service rule {rule!r} needs a 'to' value")
+        value = frozenset(rule["value"]) if kind == "exact" else rule["value"]
+        steps.append((kind, value, rule.get("to")))
+    return steps
+
+
+def compile_rules(rules):
+    """Turn a rules table into ``normalize(service, client)`` for one distinct pair (NaN service or client allowed)."""
+    steps = rule_steps(rules)
+
+    def normalize(service, client):
+        client = str(client) if client == client else ""
+        service = service if isinstance(service, str) else None
+        for kind, value, target in steps:
+            if kind == "client_prefix":
+                if client.startswith(value):
+                    return target
+            elif service is None:
+                continue
+            elif kind == "strip_prefix":
+                if service.startswith(value):
+                    service = service[len(value):]
+            elif kind == "prefix":
+                if service.strip().startswith(value):
+                    return target
+            elif service.strip() in value:
+                return target
+        return service.strip() if service is not None else None
+
+    return normalize
+
+
+@functools.lru_cache(maxsize=4)
+def _compiled(path, mtime_ns):
+    return compile_rules(load_rules(path))
+
+
+def compiled_rules(path=SERVICE_RULES):
+    """``compile_rules`` of the rules file, recompiled only when the file changes."""
+    return _compiled(path, os.stat(path).st_mtime_ns)
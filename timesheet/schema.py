@@ -0,0 +1,43 @@
+"""Compact dtypes for the stored cleaned timesheet.
+
+Repeated text columns become categoricals (integer codes plus one copy of each
+label), "Week Number" becomes a categorical ordered by the integer Week, and numeric
+columns are stored as float32 when every value survives the round trip
+(e.g. quarter-hour durations, whole hourly rates).
+"""
+import pandas as pd
+
+from timesheet.metrics import ordered_labels
+
+CATEGORY_COLUMNS = [
+    "Employee Name", "Team Name", "Position", "Product/Service full name", "Client full name",
+    "Billable (Y/N)", "Duration", "Month", "Quarter",
+]
+FLOAT32_COLUMNS = ["Hours", "Rates", "USD/Hr", "Amount"]
+
+
+def compact_dtypes(df):
+    """Return ``df`` with the compact schema applied; columns already converted are left as they are."""
+    df = df.copy(deep=False)
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns and df[column].dtype == object:
+            df[column] = df[column].astype("category")
+    if {"Week", "Week Number"}.issubset(df.columns) and df["Week Number"].dtype == object:
+        df["Week Number"] = pd.Categorical(df["Week Number"], categories=ordered_labels(df), ordered=True)
+    for column in FLOAT32_COLUMNS:
+        if column in df.columns and df[column].dtype == "float64":
+            downcast = df[column].astype("float32")
+            if downcast.astype("float64").equals(df[column]):
+                df[column] = downcast
+    return df
+
+
+def memory_report(before, after):
+    """Deep memory usage per column of two versions of a frame, in MB, with a total row."""
+    report = pd.DataFrame({
+        "Before (MB)": before.memory_usage(deep=True, index=False),
+        "After (MB)": after.memory_usage(deep=True, index=False),
+    }) / 1e6
+    report.loc["Total"] = report.sum()
+    report["Reduction (x)"] = (report["Before (MB)"] / report["After (MB)"]).round(1)
+    return report.round(3)
@@ -0,0 +1,70 @@
+"""Read-only SQL over the stored timesheet data, run in-process by DuckDB.
+
+The cleaned rows and the aggregate cube are exposed as the views
+``timesheet`` (over the week files of the store) and ``cube`` over their
+Parquet files, so a query scans only the columns and weeks it needs instead
+of loading the frames into pandas first, and sees newly saved data without
+reconnecting. The connection may read the store and the cube and nothing else.
+"""
+import os
+
+import duckdb
+import streamlit as st
+
+from timesheet.perf import staged
+from timesheet.store import CLEANED_STORE, CUBE_PARQUET, data_version
+
+VIEWS = {"timesheet": CLEANED_STORE, "cube": CUBE_PARQUET}
+
+
+def connect(views=None):
+    """Open an in-memory DuckDB connection with one view per Parquet file or store directory of ``views`` ({name: path})."""
+    paths = {name: os.path.abspath(path) for name, path in (views or VIEWS).items()}
+    directories = [path for path in paths.values() if not path.endswith(".parquet")]
+    connection = duckdb.connect()
+    for name, path in paths.items():
+        if path in directories:
+            # Week files written at different times can differ in types, so they are combined by column name
+            connection.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet('{path}/*.parquet', union_by_name = true)")
+        else:
+            connection.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet('{path}')")
+    connection.execute("SET allowed_paths = ?", [[path for path in paths.values() if path not in directories]])
+    connection.execute("SET allowed_directories = ?", [directories])
+    connection.execute("SET enable_external_access = false")
+    return connection
+
+
+@st.cache_resource(show_spinner=False)
+def _shared_connection():
+    return connect()
+
+
+def check_select(sql):
+    """Raise ValueError unless ``sql`` is a single SELECT (or WITH ... SELECT) statement."""
+    statements = duckdb.extract_statements(sql)
+    if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+        raise ValueError("Only a single SELECT query can be run.")
+
+
+@staged("sql query")
+def run_query(sql, params=None, connection=None):
+    """Run one SELECT with ``?`` or ``$name`` placeholders bound from ``params``; returns a DataFrame."""
+    check_select(sql)
+    cursor = (connection or _shared_connection()).cursor()
+    try:
+        return cursor.execute(sql, params).df()
+    finally:
+        cursor.close()
+
+
+@st.cache_data(show_spinner="Running query...", max_entries=64)
+def _cached_query(sql, params, file_key):
+    return run_query(sql, list(params) if isinstance(params, tuple) else params)
+
+
+def query(sql, params=None):
+    """``run_query`` against the shared connection, cached per query, parameters and saved data.
+
+    Pass ``params`` as a tuple or dict so it can be part of the cache key.
+    """
+    return _cached_query(sql, params, data_version())
@@ -0,0 +1,437 @@
+"""Persistent hand-off of the cleaned timesheet between the upload page and the dashboards.
+
+The cleaned frame is stored as Parquet, which loads an order of magnitude
+faster than parsing an xlsx through openpyxl, next to the aggregate cube
+built from it. ``cleaned_data.xlsx``, and the single ``cleaned_data.parquet``
+file of earlier versions, are only read as legacy fallbacks and are
+converted to the current store the first time they are used.
+
+The cleaned rows are stored as one Parquet file per week
+(``cleaned_data/Week=N.parquet``), so ``load_partitions`` reads only the
+files of the weeks a view needs and ``replace_weeks`` rewrites only the
+weeks that changed; the cost of both follows the weeks touched, not the
+length of the year. Each file is replaced atomically, but a reader running
+during a save can see some weeks from before it and some from after. Week
+files written at different times can differ in dtypes (e.g. the width of
+categorical codes), which ``_read_weeks`` unifies. The cube is small and
+always read whole, so it is a single file.
+"""
+import os
+import re
+import tempfile
+from contextlib import ExitStack, contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from timesheet.cube import build_cube, combine_cubes
+from timesheet.dates import add_calendar_columns, parse_activity_dates
+from timesheet.metrics import employee_weeks
+from timesheet.perf import staged
+from timesheet.schema import FLOAT32_COLUMNS, compact_dtypes
+
+CLEANED_STORE = "cleaned_data"
+CUBE_PARQUET = "cleaned_cube.parquet"
+LEGACY_PARQUET = "cleaned_data.parquet"
+LEGACY_XLSX = "cleaned_data.xlsx"
+
+# Files of the cleaned store: one per week, or a single one for frames without a Week column.
+WEEK_FILE = re.compile(r"^Week=(-?\d+)\.parquet$")
+UNPARTITIONED_FILE = "rows.parquet"
+
+# Columns kept numeric by the streaming writer even when a chunk has no values in them.
+NUMERIC_COLUMNS = [*FLOAT32_COLUMNS, "Projects USD"]
+
+
+def _arrow_safe(df):
+    """Cast object columns holding mixed Python types (e.g. numbers and text from Excel) to strings."""
+    df = df.copy()
+    for column in df.select_dtypes(include="object").columns:
+        if pd.api.types.infer_dtype(df[column], skipna=True) in ("mixed", "mixed-integer"):
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    return df
+
+
+@contextmanager
+def _replacing(path):
+    """Yield a fresh temporary path next to ``path`` and move it over ``path`` once the block succeeds.
+
+    Each writer gets its own temporary file, so sessions saving at the same
+    time never write into each other's file, and readers never see a
+    half-written one.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_parquet(df, path):
+    """Write atomically with ``_replacing``."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with _replacing(path) as tmp_path:
+        pq.write_table(table, tmp_path)
+
+
+def _week_path(directory, week):
+    return os.path.join(directory, UNPARTITIONED_FILE if week is None else f"Week={week}.parquet")
+
+
+def _week_files(directory):
+    """``{week: path}`` of the files in the store ``directory`` in week order; None is the unpartitioned file."""
+    if not os.path.isdir(directory):
+        return {}
+    files = {}
+    for name in os.listdir(directory):
+        match = WEEK_FILE.match(name)
+        if match:
+            files[int(match[1])] = os.path.join(directory, name)
+        elif name == UNPARTITIONED_FILE:
+            files[None] = os.path.join(directory, name)
+    return dict(sorted(files.items(), key=lambda item: (item[0] is None, item[0] or 0)))
+
+
+def _split_weeks(df):
+    """``{week: rows}`` of ``df`` in week order, each sorted by team; ``{None: df}`` without a Week column."""
+    if "Week" not in df.columns:
+        return {None: df}
+    if "Team Name" in df.columns:
+        df = df.sort_values("Team Name", kind="stable", na_position="last")
+    return {int(week): rows for week, rows in df.groupby("Week", sort=True)}
+
+
+def _week_tables(df):
+    """``{week: table}`` of ``df`` like ``_split_weeks``, converted to Arrow once and sliced per week."""
+    if "Week" not in df.columns or df.empty:
+        return {None: pa.Table.from_pandas(df, preserve_index=False)}
+    df = df.sort_values(["Week", "Team Name"] if "Team Name" in df.columns else ["Week"], kind="stable", na_position="last")
+    weeks = df["Week"].to_numpy()
+    starts = [0, *(np.flatnonzero(np.diff(weeks)) + 1).tolist()]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return {int(weeks[start]): table.slice(start, stop - start) for start, stop in zip(starts, [*starts[1:], len(df)])}
+
+
+def _remove_weeks(directory, weeks):
+    for week in weeks:
+        try:
+            os.remove(_week_path(directory, week))
+        except FileNotFoundError:
+            pass
+
+
+def _write_weeks(df, directory, replaced=None):
+    """Write each week of ``df`` to its own file in ``directory`` and remove stored weeks that ``df`` lacks.
+
+    Only the stored weeks of ``replaced`` (week numbers) are candidates for
+    removal; all of them when it is None, i.e. ``df`` replaces the store.
+    """
+    os.makedirs(directory, exist_ok=True)
+    weeks = _week_tables(df)
+    for week, table in weeks.items():
+        with _replacing(_week_path(directory, week)) as tmp_path:
+            pq.write_table(table, tmp_path)
+    stored = _week_files(directory) if replaced is None else [int(week) for week in replaced]
+    _remove_weeks(directory, [week for week in stored if week not in weeks])
+
+
+def _read_weeks(paths):
+    """Read week files into one frame, unifying dtypes that differ between files written at different times.
+
+    Text written plainly by the streaming writer is dictionary-encoded where
+    other files store it as categorical, integer and float widths are
+    promoted, and the categorical dictionaries are merged; the files are in
+    week order, so "Week Number" categories come out in week order too.
+    """
+    tables = []
+    for path in paths:
+        with pq.ParquetFile(path) as week_file:
+            tables.append(week_file.read())
+    dictionaries = {field.name: field.type for table in tables for field in table.schema if pa.types.is_dictionary(field.type)}
+    tables = [
+        table.cast(pa.schema(
+            [field.with_type(dictionaries[field.name]) if field.name in dictionaries and pa.types.is_string(field.type) else field
+             for field in table.schema],
+            metadata=table.schema.metadata,
+        ))
+        for table in tables
+    ]
+    return pa.concat_tables(tables, promote_options="permissive").unify_dictionaries().to_pandas()
+
+
+def _upgrade(df):
+    """Bring frames saved by older versions (string dates, no calendar columns) up to the current schema."""
+    if "Week" not in df.columns and "Activity date" in df.columns:
+        df = df.copy(deep=False)
+        df["Activity date"] = parse_activity_dates(df["Activity date"])
+        df = add_calendar_columns(df)
+    return compact_dtypes(df)
+
+
+@staged("save store")
+def save_cleaned(df, path=CLEANED_STORE, cube_path=CUBE_PARQUET):
+    """Persist the cleaned frame with the compact schema, one file per week, and the aggregate cube built from it.
+
+    Returns the frame as stored.
+    """
+    df = _upgrade(_arrow_safe(df))
+    _write_weeks(df, path)
+    _write_parquet(_arrow_safe(build_cube(df)), cube_path)
+    return df
+
+
+def _has_text(values):
+    return values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) in ("string", "mixed", "mixed-integer")
+
+
+def _chunk_schema(df):
+    """The Arrow schema of the streamed store, from its first chunk.
+
+    pandas infers dtypes per chunk, so a column can come out as int64 in one
+    chunk and float64 in the next, or entirely missing; integer columns are
+    widened to float, and entirely missing ones other than the numeric
+    columns to string. Text is never coerced to numbers: ``_widen_schema``
+    turns a numeric column that later receives text into a string one.
+    """
+    df = _arrow_safe(df)
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    fields = []
+    for field in inferred:
+        empty = pa.types.is_null(field.type) or pa.types.is_floating(field.type) and df[field.name].isna().all()
+        if empty and field.name not in NUMERIC_COLUMNS:
+            field = field.with_type(pa.string())
+        elif field.type == pa.int64():
+            field = field.with_type(pa.float64())
+        fields.append(field)
+    # The pandas metadata restores extension dtypes such as the nullable Int32 of Month Key on reading
+    return pa.schema(fields, metadata=inferred.metadata)
+
+
+def _chunk_table(df, schema):
+    """Convert cleaned rows of a chunk to an Arrow table coerced to ``schema``."""
+    df = _arrow_safe(df)
+    for field in schema:
+        values = df[field.name]
+        if pa.types.is_string(field.type) and values.dtype != object:
+            df[field.name] = values.astype(object).where(values.isna(), values.astype(str))
+        elif pa.types.is_floating(field.type) and values.dtype == object:
+            df[field.name] = pd.to_numeric(values)
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def _widen_schema(schema, df):
+    """``schema`` with its numeric columns that have text in ``df`` turned into strings."""
+    return pa.schema(
+        [field.with_type(pa.string()) if pa.types.is_floating(field.type) and _has_text(df[field.name]) else field
+         for field in schema],
+        metadata=schema.metadata,
+    )
+
+
+def _rewrite(writer, path, schema):
+    """Close ``writer``, rewrite what it wrote to ``path`` with ``schema`` and return a writer appending to it."""
+    writer.close()
+    with pq.ParquetFile(path) as written:
+        tables = [_chunk_table(written.read_row_group(i).to_pandas(), schema) for i in range(written.num_row_groups)]
+    writer = pq.ParquetWriter(path, schema)
+    for table in tables:
+        writer.write_table(table)
+    return writer
+
+
+@staged("save store in chunks")
+def save_cleaned_chunks(chunks, path=CLEANED_STORE, cube_path=CUBE_PARQUET):
+    """Append cleaned chunks to the week files of the store as they arrive, then write the cube combined from per-chunk cubes.
+
+    Only one chunk is held in memory at a time; a writer per week stays open
+    on a temporary file until the last chunk. Returns the number of rows stored.
+    """
+    os.makedirs(path, exist_ok=True)
+    schema = None
+    writers = {}
+    cubes = []
+    rows = 0
+    with ExitStack() as files:
+        for chunk in chunks:
+            if schema is None:
+                schema = _chunk_schema(chunk)
+            elif not (widened := _widen_schema(schema, chunk)).equals(schema):
+                writers = {week: (tmp_path, _rewrite(writer, tmp_path, widened)) for week, (tmp_path, writer) in writers.items()}
+                schema = widened
+            for week, week_rows in _split_weeks(chunk).items():
+                if week not in writers:
+                    tmp_path = files.enter_context(_replacing(_week_path(path, week)))
+                    writers[week] = (tmp_path, pq.ParquetWriter(tmp_path, schema))
+                    files.callback(lambda week=week: writers[week][1].close())
+                writers[week][1].write_table(_chunk_table(week_rows, schema))
+            cubes.append(build_cube(chunk))
+            rows += len(chunk)
+        if not writers:
+            raise ValueError("The timesheet file has no rows.")
+    _remove_weeks(path, [week for week in _week_files(path) if week not in writers])
+    _write_parquet(_arrow_safe(compact_dtypes(combine_cubes(cubes))), cube_path)
+    return rows
+
+
+@staged("replace weeks in store")
+def replace_weeks(rows, weeks, path=CLEANED_STORE, cube_path=CUBE_PARQUET):
+    """Replace the stored rows and cube rows of ``weeks`` (integer Week values) with the cleaned ``rows``.
+
+    Only the files of ``weeks`` are rewritten and only ``rows`` are
+    aggregated; the other weeks and the rest of the cube are carried over as
+    stored. Returns ``rows`` as stored.
+    """
+    rows = _upgrade(_arrow_safe(rows))
+    cube = load_cube(cube_path, path)
+    cube = pd.concat([cube[~cube["Week"].isin(weeks)], build_cube(rows)], ignore_index=True)
+    _write_weeks(rows, path, replaced=weeks)
+    _write_parquet(_arrow_safe(compact_dtypes(cube)), cube_path)
+    return rows
+
+
+def cleaned_data_exists(path=CLEANED_STORE):
+    return bool(_week_files(path)) or os.path.exists(LEGACY_PARQUET) or os.path.exists(LEGACY_XLSX)
+
+
+@staged("load cleaned data")
+def load_cleaned(path=CLEANED_STORE):
+    """Load the cleaned frame, or return None if no cleaned data has been saved yet."""
+    files = _week_files(path)
+    if files:
+        return _upgrade(_read_weeks(files.values()))
+    for legacy in (LEGACY_PARQUET, LEGACY_XLSX):
+        if os.path.exists(legacy):
+            df = _upgrade(pd.read_parquet(legacy) if legacy.endswith(".parquet") else pd.read_excel(legacy))
+            try:
+                save_cleaned(df, path)
+            except OSError:
+                pass
+            return df
+    return None
+
+
+@staged("load cube")
+def load_cube(path=CUBE_PARQUET, cleaned_path=CLEANED_STORE):
+    """Load the aggregate cube, building it from the cleaned data if it has not been saved yet."""
+    if os.path.exists(path):
+        cube = pd.read_parquet(path)
+        if "Week" in cube.columns:
+            return cube
+    df = load_cleaned(cleaned_path)
+    if df is None:
+        return None
+    cube = build_cube(df)
+    try:
+        _write_parquet(_arrow_safe(cube), path)
+    except OSError:
+        pass
+    return cube
+
+
+@staged("load partitions")
+def load_partitions(weeks=None, teams=None, path=CLEANED_STORE):
+    """Load only the stored rows of ``weeks`` (integer Week values) and ``teams``; None means all.
+
+    Only the files of ``weeks`` are read, so the cost follows the weeks read,
+    not the length of the year.
+    """
+    weeks = None if weeks is None else [int(week) for week in weeks]
+    teams = None if teams is None else [str(team) for team in teams]
+    files = _week_files(path)
+    if files:
+        selected = [file for week, file in files.items() if weeks is None or week is None or week in weeks]
+        # With no stored week selected, one file still gives the columns of the empty result
+        df = _upgrade(_read_weeks(selected or list(files.values())[:1]))
+    else:
+        df = load_cleaned(path)
+        if df is None:
+            return None
+    if weeks is not None:
+        df = df[df["Week"].isin(weeks)]
+    if teams is not None and "Team Name" in df.columns:
+        df = df[df["Team Name"].isin(teams)]
+    return df.reset_index(drop=True)
+
+
+def _file_key(*paths):
+    """Return (path, mtime_ns, size) of the first existing path, or None."""
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            return path, stat.st_mtime_ns, stat.st_size
+    return None
+
+
+def store_version(path=CLEANED_STORE):
+    """(name, mtime_ns, size) of every week file of the store, or None when it has none; changes with every save."""
+    version = []
+    for file in _week_files(path).values():
+        try:
+            stat = os.stat(file)
+        except FileNotFoundError:  # removed by a save running now
+            continue
+        version.append((os.path.basename(file), stat.st_mtime_ns, stat.st_size))
+    return tuple(version) or None
+
+
+@st.cache_resource(show_spinner="Loading team aggregates...", max_entries=2)
+def _load_shared_cube(path, cleaned_path, file_key):
+    return load_cube(path, cleaned_path)
+
+
+@st.cache_resource(show_spinner="Loading timesheet rows...", max_entries=32)
+def _load_shared_partitions(path, file_key, weeks, teams):
+    return load_partitions(weeks, teams, path)
+
+
+def load_shared_partitions(weeks=None, teams=None, path=CLEANED_STORE):
+    """Return ``load_partitions`` from a single cache shared by every session and page.
+
+    The cache is keyed by the week files' modification times and sizes, so
+    saving new cleaned data invalidates it. The frame is shared, so callers must not modify
+    it in place; take ``df.copy(deep=False)`` before assigning columns.
+    """
+    file_key = store_version(path) or _file_key(LEGACY_PARQUET, LEGACY_XLSX)
+    if file_key is None:
+        return None
+    weeks = None if weeks is None else tuple(sorted(int(week) for week in weeks))
+    teams = None if teams is None else tuple(sorted(str(team) for team in teams))
+    return _load_shared_partitions(path, file_key, weeks, teams)
+
+
+def data_version(path=CUBE_PARQUET, cleaned_path=CLEANED_STORE):
+    """Cache key that changes whenever new cleaned data is saved, for caches derived from the cube."""
+    return _file_key(path) or store_version(cleaned_path) or _file_key(LEGACY_PARQUET, LEGACY_XLSX)
+
+
+def load_shared_cube(path=CUBE_PARQUET, cleaned_path=CLEANED_STORE):
+    """Return the aggregate cube from the same kind of shared, file-keyed cache as ``load_shared_partitions``."""
+    file_key = data_version(path, cleaned_path)
+    if file_key is None:
+        return None
+    return _load_shared_cube(path, cleaned_path, file_key)
+
+
+@st.cache_resource(show_spinner="Summarizing employee weeks...", max_entries=2)
+def _load_shared_employee_weeks(path, cleaned_path, file_key):
+    cube = _load_shared_cube(path, cleaned_path, file_key)
+    return employee_weeks(cube) if cube is not None else None
+
+
+def load_shared_employee_weeks(path=CUBE_PARQUET, cleaned_path=CLEANED_STORE):
+    """Return ``metrics.employee_weeks`` of the shared cube, built once per saved file.
+
+    The team insights and Data Check pages both read their per-employee
+    weekly figures from this table.
+    """
+    file_key = data_version(path, cleaned_path)
+    if file_key is None:
+        return None
+    return _load_shared_employee_weeks(path, cleaned_path, file_key)
@@ -0,0 +1,155 @@
+"""Shared layout of the "& Team Insights" pages, drawn from the precomputed team insights."""
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from timesheet import perf
+from timesheet.insights import TEAMS, load_shared_insights
+from timesheet.metrics import ordered_labels
+from timesheet.store import load_shared_partitions
+
+
+def employee_rows(employee, team, weeks):
+    """The employee's cleaned rows in ``weeks``, read from just those week partitions of the team."""
+    rows = load_shared_partitions(weeks, [team])
+    return rows[rows["Employee Name"] == employee]
+
+
+@st.fragment
+def employee_breakdown(df, employees, team):
+    """Employee drill-down; its widgets rerun only this fragment, not the charts above it.
+
+    ``employees`` maps each employee to their row positions in ``df``.
+    """
+    st.subheader("Employee-Level Breakdown")
+    selected_emp = st.selectbox("Select Employee", sorted(employees))
+    emp_data = df.iloc[employees[selected_emp]]
+    view_mode = st.radio("View Mode", ["Overall", "Weekly", "Monthly"], horizontal=True)
+
+    if view_mode == "Overall":
+        time_off = emp_data[emp_data["Product/Service full name"] == "Time off"]["Hours"].sum()
+        total_expected = emp_data["Week Number"].nunique() * 40
+        available = total_expected - time_off
+        breakdown = emp_data[emp_data["Product/Service full name"] != "Time off"]
+        summary = breakdown.groupby("Product/Service full name", observed=True)["Hours"].sum().reset_index()
+        summary["% of Available Time"] = (summary["Hours"] / available * 100).round(2)
+        fig = px.bar(summary, x="Product/Service full name", y="% of Available Time", text="% of Available Time",
+                     color="Product/Service full name")
+        st.plotly_chart(fig, use_container_width=True)
+
+    elif view_mode == "Weekly":
+        selected_week = st.selectbox("Select Week", ordered_labels(emp_data))
+        week_data = emp_data[emp_data["Week Number"] == selected_week]
+        time_off = week_data[week_data["Product/Service full name"] == "Time off"]["Hours"].sum()
+        available = 40 - time_off
+        breakdown = week_data[week_data["Product/Service full name"] != "Time off"]
+        summary = breakdown.groupby("Product/Service full name", observed=True)["Hours"].sum().reset_index()
+        summary["% of Available Time"] = (summary["Hours"] / available * 100).round(2)
+        fig = px.bar(summary, x="Product/Service full name", y="% of Available Time", text="% of Available Time",
+                     color="Product/Service full name")
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.markdown("#### Weekly Activity Log")
+        rows = employee_rows(selected_emp, team, week_data["Week"].unique())
+        log = rows[["Client full name", "Product/Service full name", "Description", "Rates", "Duration"]]
+        st.dataframe(log.reset_index(drop=True))
+
+    elif view_mode == "Monthly":
+        selected_month = st.selectbox("Select Month", ordered_labels(emp_data, "Month", "Month Key"))
+        month_data = emp_data[emp_data["Month"] == selected_month]
+        time_off = month_data[month_data["Product/Service full name"] == "Time off"]["Hours"].sum()
+        available = len(month_data["Week Number"].unique()) * 40 - time_off
+        breakdown = month_data[month_data["Product/Service full name"] != "Time off"]
+        summary = breakdown.groupby("Product/Service full name", observed=True)["Hours"].sum().reset_index()
+        summary["% of Available Time"] = (summary["Hours"] / available * 100).round(2)
+        fig = px.bar(summary, x="Product/Service full name", y="% of Available Time", text="% of Available Time",
+                     color="Product/Service full name")
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.markdown("#### Monthly Activity Log")
+        rows = employee_rows(selected_emp, team, month_data["Week"].unique())
+        rows = rows[rows["Month"] == selected_month]
+        log = rows[["Client full name", "Product/Service full name", "Description", "Rates", "Duration"]]
+        st.dataframe(log.reset_index(drop=True))
+
+
+def render_team_page(team):
+    title = TEAMS[team]["title"]
+    st.set_page_config(page_title=f"{title} Insights", layout="wide")
+    perf.begin(f"{title} Insights")
+    st.title(f"📊 {title} Detailed Insights")
+
+    insights = load_shared_insights().get(team)
+    if insights is None:
+        st.info(f"No timesheet data found for {team}. Please process data on the upload page first.")
+        st.stop()
+
+    df = insights["rows"]
+    latest_week = insights["latest_week"]
+
+    with perf.stage("team charts"):
+        # --- Last Week Productivity ---
+        st.subheader("Last Week Productivity Hours")
+        fig = px.bar(insights["productivity"], x="Employee Name", y="Hours", text="Hours", color="Employee Name")
+        fig.update_layout(height=350, margin=dict(t=10, b=10))
+        st.plotly_chart(fig, use_container_width=True)
+
+        # --- % Breakdown by Product/Service ---
+        st.subheader(f"{latest_week} Breakdown by Product/Service")
+        fig2 = px.bar(insights["services"], x="Product/Service full name", y="% of Available Time", text="% of Available Time",
+                      color="Product/Service full name")
+        fig2.update_layout(height=400, showlegend=False)
+        st.plotly_chart(fig2, use_container_width=True)
+
+        # --- % Breakdown by Product/Service by Position ---
+        st.subheader(f"{latest_week} - Position Breakdown by Product/Service")
+        fig_pos = px.bar(insights["positions"], x="Product/Service full name", y="% of Available Time", color="Position",
+                         barmode="group", text="% of Available Time")
+        fig_pos.update_layout(height=400, xaxis_title="Product/Service", yaxis_title="% of Available Time")
+        st.plotly_chart(fig_pos, use_container_width=True)
+
+        # --- Time Off by Position ---
+        st.subheader(f"{latest_week} - Time Off Breakdown by Position and Employee")
+        fig_timeoff = px.bar(insights["time_off"], x="Hours", y="Employee Name", color="Position",
+                             orientation="h", text="Hours")
+        fig_timeoff.update_layout(height=500, xaxis_title="Time Off Hours", yaxis_title="Employee", barmode="stack")
+        st.plotly_chart(fig_timeoff, use_container_width=True)
+
+        # --- Weekly Project % Trend ---
+        st.subheader("Team Project % Trend")
+        fig3 = px.line(insights["trend"], x="Week", y="% Projects", markers=True)
+        fig3.update_layout(height=350)
+        st.plotly_chart(fig3, use_container_width=True)
+
+        # --- Target Overview ---
+        st.subheader("Target vs Achieved")
+        achieved = insights["achieved"]
+        team_target = TEAMS[team]["target"]
+        donut_fig = go.Figure(data=[
+            go.Pie(labels=["Achieved", "Remaining"],
+                   values=[achieved, max(0, team_target - achieved)],
+                   hole=0.6,
+                   marker=dict(colors=["#607d8b", "#cfd8dc"]),
+                   textinfo="percent")
+        ])
+        donut_fig.update_layout(height=400, showlegend=True)
+        st.plotly_chart(donut_fig, use_container_width=True)
+
+        # --- Overall Breakdown by Product/Service ---
+        st.subheader("Overall Breakdown by Product/Service")
+        fig4 = px.bar(insights["overall"], x="Product/Service full name", y="% of Available Time", text="% of Available Time",
+                      color="Product/Service full name")
+        fig4.update_layout(height=400, showlegend=False)
+        st.plotly_chart(fig4, use_container_width=True)
+
+        # --- Individual Project % of Available Time (Stacked) ---
+        st.subheader("Overall Project % by Employee")
+        fig5 = px.bar(insights["individual"], x="% Project Time", y="Employee Name", text="% Project Time",
+                      orientation="h", color="Employee Name")
+        fig5.update_layout(height=500, showlegend=False)
+        st.plotly_chart(fig5, use_container_width=True)
+
+    # --- Employee Breakdown View ---
+    employee_breakdown(df, insights["employees"], team)
+
+    perf.panel()